@@ -0,0 +1,311 @@
+"""
+Benchmarks for model checking on generated knights and knaves puzzles.
+
+Usage: python benchmark.py [--people N ...] [--max-original SYMBOLS] [--seed S]
+       python benchmark.py --sat [--people N ...] [--seed S]
+       python benchmark.py --build [--people N ...] [--seed S]
+       python benchmark.py --kb [--people N ...] [--seed S]
+       python benchmark.py --parallel [--people N ...] [--workers N ...] [--seed S]
+       python benchmark.py --leaves [--people N ...] [--seed S]
+
+Each puzzle has N people, so 2 * N symbols, who each say one random
+sentence about the others. For each puzzle, asks whether the first
+person is a knight with model_check without pruning (only up to
+--max-original symbols, 16 by default, as it copies a dict for every
+model), with a compiled closure called on every bitmask model in a
+loop, and with model_check_compiled on bit columns.
+
+With --sat, puzzles of hundreds of symbols (50 to 400 people by
+default) are solved with sat.model_check, asking about every symbol,
+and the answers are checked against model_check_compiled on puzzles
+small enough to enumerate.
+
+With --build, puzzles of 1000 to 8000 people by default are built
+twice, reporting the time and memory (traced by tracemalloc) to build
+them, and the time for 100 calls each of symbols(), hash() and
+formula() on the knowledge base. It first checks that adding to an And
+changes neither an equal And nor what is cached by sentences holding it.
+
+With --kb, every symbol of each puzzle is queried, once with
+model_check_compiled per symbol and once with a KnowledgeBase answering
+them all together, built either from the whole knowledge base or one
+fact at a time.
+
+With --parallel, one query the puzzle entails (so every model is
+checked) and one it does not are answered by model_check_compiled and
+by model_check_parallel with each number of workers (1, 2 and every
+core by default), reporting the speedup over model_check_compiled.
+
+With --leaves, the puzzles of puzzle.py and generated puzzles (3 to 8
+people by default) ask about every symbol with model_check, with and
+without pruning partial models, counting the models the search stops
+at against the 2 ** n of full enumeration.
+"""
+
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+import sat
+from logic import *
+
+
+DEFAULT_PEOPLE = [6, 8, 10, 11, 12]
+
+
+def knight(person):
+    return Symbol(f"P{person} is a Knight")
+
+
+def knave(person):
+    return Symbol(f"P{person} is a Knave")
+
+
+def statement(rng, people, speaker):
+    """
+    Returns a random sentence for `speaker` to say about others.
+    """
+    def other():
+        if people == 1:
+            return speaker
+        person = rng.randrange(people - 1)
+        return person + (person >= speaker)
+
+    a, b = other(), other()
+    return rng.choice([
+        lambda: knave(a),
+        lambda: knight(a),
+        lambda: And(knight(a), knave(b)),
+        lambda: Or(knave(a), knave(b)),
+        lambda: Biconditional(knight(a), knight(b)),
+        lambda: Not(Biconditional(knight(a), knight(b))),
+    ])()
+
+
+def generate(people, seed=0):
+    """
+    Returns (symbols, knowledge) for a puzzle with `people` people,
+    each either a knight or a knave and each saying one sentence. The
+    people are dealt hidden kinds first and only say sentences that
+    fit them, so the puzzle always has a solution.
+    """
+    rng = random.Random(seed)
+    kinds = {}
+    for person in range(people):
+        is_knight = rng.random() < 0.5
+        kinds[knight(person).name] = is_knight
+        kinds[knave(person).name] = not is_knight
+
+    knowledge = And()
+    for person in range(people):
+        said = statement(rng, people, person)
+        while said.evaluate(kinds) != kinds[knight(person).name]:
+            said = statement(rng, people, person)
+        knowledge.add(Biconditional(knight(person), Not(knave(person))))
+        knowledge.add(Biconditional(knight(person), said))
+    symbols = [symbol(person) for person in range(people) for symbol in (knight, knave)]
+    return symbols, knowledge
+
+
+def closure_check(knowledge, query):
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    entailed = compile_sentence(Implication(knowledge, query), symbols)
+    return all(map(entailed, range(1 << len(symbols))))
+
+
+def timed(check, knowledge, query):
+    start = time.perf_counter()
+    result = check(knowledge, query)
+    return result, time.perf_counter() - start
+
+
+def benchmark_sat(people_counts, seed):
+    for people in [5, 10]:
+        symbols, knowledge = generate(people, seed)
+        for symbol in symbols:
+            if sat.model_check(knowledge, symbol) != model_check_compiled(knowledge, symbol):
+                print(f"  sat and enumeration differ on {symbol} with {people} people")
+
+    for people in people_counts:
+        symbols, knowledge = generate(people, seed)
+        start = time.perf_counter()
+        consistent = sat.satisfiable(knowledge) is not None
+        first = time.perf_counter() - start
+        entailed = sum(1 for symbol in symbols if sat.model_check(knowledge, symbol))
+        elapsed = time.perf_counter() - start - first
+        print(f"{len(symbols):5} symbols  {'consistent' if consistent else 'contradictory':13}  "
+              f"satisfiable {first * 1000:8.1f} ms  {entailed:4} of {len(symbols)} entailed "
+              f"in {elapsed:7.3f} s ({elapsed / len(symbols) * 1000:.2f} ms per query)")
+
+
+def check_add():
+    """
+    Prints a line for each way And.add leaks into other sentences.
+    """
+    a, b, c = Symbol("A"), Symbol("B"), Symbol("C")
+    x, y = And(a, b), And(a, b)
+    x.add(c)
+    if y.conjuncts != (a, b):
+        print(f"  adding to one And changed another: {y}")
+
+    knowledge = And(a)
+    query = Implication(knowledge, b)
+    query.symbols(), query.formula(), hash(query)
+    knowledge.add(c)
+    if query.symbols() != {"A", "B", "C"} or "C" not in query.formula():
+        print(f"  {query} kept what it cached before an add")
+    for check in (model_check, model_check_compiled, sat.model_check):
+        try:
+            if check(query, b):
+                print(f"  {check.__module__}.{check.__name__} entails B")
+        except Exception as e:
+            print(f"  {check.__module__}.{check.__name__} raised {e!r}")
+
+
+def benchmark_build(people_counts, seed):
+    check_add()
+    for people in people_counts:
+        tracemalloc.start()
+        start = time.perf_counter()
+        puzzles = [generate(people, seed), generate(people, seed)]
+        built = time.perf_counter() - start
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        knowledge = puzzles[0][1]
+
+        timings = []
+        for method in (knowledge.symbols, knowledge.__hash__, knowledge.formula):
+            start = time.perf_counter()
+            for _ in range(100):
+                method()
+            timings.append(time.perf_counter() - start)
+        print(f"{2 * people:6} symbols  built twice in {built:6.3f} s  {memory / 2 ** 20:7.1f} MiB  "
+              f"100 x symbols {timings[0]:6.3f} s  hash {timings[1]:6.3f} s  "
+              f"formula {timings[2]:6.3f} s")
+
+
+def benchmark_kb(people_counts, seed):
+    for people in people_counts:
+        symbols, knowledge = generate(people, seed)
+        print(f"{len(symbols)} symbols")
+
+        start = time.perf_counter()
+        expected = [model_check_compiled(knowledge, symbol) for symbol in symbols]
+        print(f"  {'per query':14} {time.perf_counter() - start:9.3f} s")
+
+        for label, facts in (("whole", [knowledge]), ("one at a time", knowledge.conjuncts)):
+            start = time.perf_counter()
+            base = KnowledgeBase(*facts)
+            answers = base.entails_all(symbols)
+            print(f"  {label:14} {time.perf_counter() - start:9.3f} s  "
+                  f"{len(base.models)} models kept")
+            if answers != expected:
+                print("  answers differ")
+
+
+def benchmark_parallel(people_counts, workers, seed):
+    print(f"{os.cpu_count()} cores")
+    for people in people_counts:
+        symbols, knowledge = generate(people, seed)
+        entailed = KnowledgeBase(knowledge).entails_all(symbols)
+        queries = [("entailed", symbols[entailed.index(True)])]
+        if False in entailed:
+            queries.append(("not entailed", symbols[entailed.index(False)]))
+
+        print(f"{len(symbols)} symbols")
+        for label, query in queries:
+            result, single = timed(model_check_compiled, knowledge, query)
+            print(f"  {label:12} {'compiled':11} {single:8.3f} s")
+            for count in workers:
+                start = time.perf_counter()
+                if model_check_parallel(knowledge, query, count) != result:
+                    print("  answers differ")
+                elapsed = time.perf_counter() - start
+                print(f"  {label:12} {count:2} workers  {elapsed:8.3f} s  "
+                      f"speedup {single / elapsed:5.2f}x")
+
+
+def benchmark_leaves(people_counts, seed):
+    import puzzle
+
+    symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+               puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    puzzles = [(f"puzzle {n}", symbols, knowledge) for n, knowledge in enumerate(
+        [puzzle.knowledge0, puzzle.knowledge1, puzzle.knowledge2, puzzle.knowledge3])]
+    for people in people_counts:
+        puzzles.append((f"{people} people", *generate(people, seed)))
+
+    for label, symbols, knowledge in puzzles:
+        counts, times = [], []
+        for prune in (False, True):
+            stats = {}
+            start = time.perf_counter()
+            for symbol in symbols:
+                model_check(knowledge, symbol, prune, stats)
+            times.append(time.perf_counter() - start)
+            counts.append(stats["leaves"])
+        n = len(set.union(knowledge.symbols(), *[symbol.symbols() for symbol in symbols]))
+        print(f"{label:10} {n:3} symbols  {len(symbols) << n:12,} models  "
+              f"leaves {counts[0]:12,} -> {counts[1]:9,}  "
+              f"{times[0]:8.3f} s -> {times[1]:7.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--people", type=int, nargs="+", default=DEFAULT_PEOPLE)
+    parser.add_argument("--max-original", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sat", action="store_true")
+    parser.add_argument("--build", action="store_true")
+    parser.add_argument("--kb", action="store_true")
+    parser.add_argument("--parallel", action="store_true")
+    parser.add_argument("--leaves", action="store_true")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    if args.leaves:
+        benchmark_leaves(args.people if args.people != DEFAULT_PEOPLE else [3, 4, 6, 8],
+                         args.seed)
+        return
+
+    if args.parallel:
+        benchmark_parallel(args.people if args.people != DEFAULT_PEOPLE else [12, 13],
+                           args.workers, args.seed)
+        return
+
+    if args.kb:
+        benchmark_kb(args.people, args.seed)
+        return
+
+    if args.build:
+        benchmark_build(args.people if args.people != DEFAULT_PEOPLE else [1000, 4000, 8000],
+                        args.seed)
+        return
+
+    if args.sat:
+        benchmark_sat(args.people if args.people != DEFAULT_PEOPLE else [50, 100, 200, 400],
+                      args.seed)
+        return
+
+    for people in args.people:
+        symbols, knowledge = generate(people, args.seed)
+        query = symbols[0]
+        print(f"{len(symbols)} symbols, {1 << len(symbols):,} models")
+        checks = [("closure", closure_check), ("columns", model_check_compiled)]
+        if len(symbols) <= args.max_original:
+            checks.insert(0, ("original", lambda k, q: model_check(k, q, prune=False)))
+        results = set()
+        for label, check in checks:
+            result, elapsed = timed(check, knowledge, query)
+            results.add(result)
+            print(f"  {label:9} {str(result):5}  {elapsed:9.3f} s  "
+                  f"{(1 << len(symbols)) / elapsed:14,.0f} models/s")
+        if len(results) > 1:
+            print("  results differ")
+
+
+if __name__ == "__main__":
+    main()
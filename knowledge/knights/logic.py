@@ -1,19 +1,146 @@
+import functools
 import itertools
+import multiprocessing
+import os
+import weakref
+
+# A weak reference to every sentence in use, so that equal sentences
+# are one object. Keys are a sentence's tag and its symbol name or the
+# ids of its operands, which are interned themselves (or, for an And,
+# are the one object there is), so looking one up never hashes a whole
+# sentence.
+interned = {}
+
+
+def forget(reference):
+    """Drops a sentence from `interned` once it is no longer used."""
+    if interned.get(reference.key) is reference:
+        del interned[reference.key]
+
+
+def cached(slot):
+    """
+    Makes a method without arguments compute its result once, keeping
+    it in `slot`.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self):
+            if self._mutable:
+                return method(self)
+            value = getattr(self, slot, None)
+            if value is None:
+                value = method(self)
+                object.__setattr__(self, slot, value)
+            return value
+        return wrapper
+    return decorator
 
 
 class Sentence():
+    """
+    Sentences are immutable and interned: building a sentence equal to
+    one that exists returns that object, and each sentence computes its
+    hash, symbols and formula once. The exception is And, which can be
+    added to: an And is never interned, and a sentence with an And
+    anywhere in it recomputes them on every call.
+    """
+
+    __slots__ = ("_hash", "_symbols", "_formula", "_mutable", "__weakref__")
+
+    # Whether sentences of the class can change after they are built
+    mutable = False
+
+    @classmethod
+    def build(cls, key, *values):
+        """
+        Returns the interned sentence of class cls for `key`, creating
+        it with `values` for the class's slots, in order, if there is
+        none. A key of None makes a new sentence that is not interned.
+        """
+        if key is not None:
+            reference = interned.get(key)
+            sentence = reference() if reference is not None else None
+            if sentence is not None:
+                return sentence
+
+        sentence = object.__new__(cls)
+        for name, value in zip(cls.__slots__, values):
+            object.__setattr__(sentence, name, value)
+        object.__setattr__(sentence, "_mutable", cls.mutable or any(
+            getattr(argument, "_mutable", False) for argument in sentence.arguments()
+        ))
+        if key is not None:
+            interned[key] = weakref.KeyedRef(sentence, forget, key)
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences cannot be changed")
+
+    def __delattr__(self, name):
+        raise AttributeError("sentences cannot be changed")
+
+    def __reduce__(self):
+        return (type(self), self.arguments())
+
+    def __eq__(self, other):
+        return self is other or (isinstance(other, Sentence) and self.key() == other.key())
+
+    def __hash__(self):
+        if self._mutable:
+            return hash(self.key())
+        value = getattr(self, "_hash", None)
+        if value is None:
+            value = hash(self.key())
+            object.__setattr__(self, "_hash", value)
+        return value
+
+    def key(self):
+        """Returns the sentence's kind and arguments as a tuple."""
+        return (self.tag,) + self.arguments()
+
+    def arguments(self):
+        """Returns the arguments the sentence was built from."""
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the sentence in a model that may leave symbols out:
+        True or False if the symbols in it decide the value, else None.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    @cached("_symbols")
+    def symbol_set(self):
+        """Returns the symbols as a frozenset, shared by every caller."""
+        return frozenset().union(*[argument.symbol_set() for argument in self.arguments()])
+
+    def expression(self, index):
+        """
+        Returns Python source for the sentence's value in a model given
+        as a bitmask m, where symbol s is true if bit index[s] is set.
+        """
+        raise Exception("nothing to compile")
+
+    def column(self, columns, mask):
+        """
+        Evaluates the sentence in many models at once: columns maps each
+        symbol to an int whose bit i is its value in model i, and the
+        result has bit i set where the sentence is true in model i.
+        """
+        raise Exception("nothing to evaluate")
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +170,14 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
+    tag = "symbol"
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return cls.build(("symbol", name), name)
 
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def arguments(self):
+        return (self.name,)
 
     def __repr__(self):
         return self.name
@@ -62,23 +188,34 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    @cached("_symbols")
+    def symbol_set(self):
+        return frozenset([self.name])
+
+    def expression(self, index):
+        return f"(m >> {index[self.name]} & 1)"
+
+    def column(self, columns, mask):
+        return columns[self.name]
 
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    __slots__ = ("operand",)
+    tag = "not"
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.build(("not", id(operand)), operand)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+    def arguments(self):
+        return (self.operand,)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +223,34 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
+    @cached("_formula")
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def expression(self, index):
+        return f"(not {self.operand.expression(index)})"
+
+    def column(self, columns, mask):
+        return mask ^ self.operand.column(columns, mask)
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+    tag = "and"
+    mutable = True
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        # Any And can be added to, so each one is a new sentence
+        return cls.build(None, conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+    def arguments(self):
+        return self.conjuncts
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +259,53 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        """Adds a conjunct in place."""
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        object.__setattr__(self, "conjuncts", self.conjuncts + (conjunct,))
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
+    @cached("_formula")
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def expression(self, index):
+        return "(" + " and ".join(
+            [conjunct.expression(index) for conjunct in self.conjuncts] or ["True"]
+        ) + ")"
+
+    def column(self, columns, mask):
+        result = mask
+        for conjunct in self.conjuncts:
+            result &= conjunct.column(columns, mask)
+        return result
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+    tag = "or"
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return cls.build(("or",) + tuple(map(id, disjuncts)), disjuncts)
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+    def arguments(self):
+        return self.disjuncts
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +314,46 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
+    @cached("_formula")
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def expression(self, index):
+        return "(" + " or ".join(
+            [disjunct.expression(index) for disjunct in self.disjuncts] or ["False"]
+        ) + ")"
+
+    def column(self, columns, mask):
+        result = 0
+        for disjunct in self.disjuncts:
+            result |= disjunct.column(columns, mask)
+        return result
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+    tag = "implies"
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.build(("implies", id(antecedent), id(consequent)), antecedent, consequent)
 
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+    def arguments(self):
+        return (self.antecedent, self.consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,56 +362,99 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
+    @cached("_formula")
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def expression(self, index):
+        return (f"(not {self.antecedent.expression(index)}"
+                f" or {self.consequent.expression(index)})")
+
+    def column(self, columns, mask):
+        return ((mask ^ self.antecedent.column(columns, mask))
+                | self.consequent.column(columns, mask))
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+    tag = "biconditional"
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.build(("biconditional", id(left), id(right)), left, right)
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+    def arguments(self):
+        return (self.left, self.right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
-
+        return self.left.evaluate(model) == self.right.evaluate(model)
+
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
+    @cached("_formula")
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def expression(self, index):
+        return (f"(bool({self.left.expression(index)})"
+                f" == bool({self.right.expression(index)}))")
+
+    def column(self, columns, mask):
+        return mask ^ self.left.column(columns, mask) ^ self.right.column(columns, mask)
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+def model_check(knowledge, query, prune=True, stats=None):
+    """
+    Checks if knowledge base entails query.
+
+    With prune, a partial model stops being extended as soon as it
+    decides the answer: when the knowledge base is already false in it,
+    or already true with the query decided. If `stats` is a dict, its
+    "leaves" count is increased by the number of models (partial or
+    not) the search stopped at.
+    """
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
+        if prune:
+            known = knowledge.evaluate_partial(model)
+            answer = query.evaluate_partial(model) if known else None
+            if known is False or answer is not None:
+                if stats is not None:
+                    stats["leaves"] = stats.get("leaves", 0) + 1
+                return known is False or answer
+
         # If model has an assignment for each symbol
         if not symbols:
+            if stats is not None:
+                stats["leaves"] = stats.get("leaves", 0) + 1
 
             # If knowledge base is true in model, then query must also be true
             if knowledge.evaluate(model):
@@ -261,3 +483,200 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+# Models checked at once by model_check_compiled, as a power of two
+CHUNK_BITS = 20
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Returns a function of a bitmask model m giving the sentence's
+    value, where symbols[i] is true in m if bit i is set.
+    """
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    return eval(f"lambda m: {sentence.expression(index)}")
+
+
+def symbol_column(i, n):
+    """
+    Returns the column of symbol i over all 2 ** n models: bit m is set
+    if bit i of m is.
+    """
+    width = 1 << i
+    column = ((1 << width) - 1) << width
+    period = 2 * width
+    while period < 1 << n:
+        column |= column << period
+        period *= 2
+    return column
+
+
+def model_check_compiled(knowledge, query):
+    """
+    Checks if knowledge base entails query, like model_check, but
+    evaluates the sentences on 2 ** CHUNK_BITS models at a time, each
+    as one bit of an int column.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    return check_columns(knowledge, query, symbols, {})
+
+
+def check_columns(knowledge, query, symbols, fixed, cancelled=None):
+    """
+    Checks if knowledge base entails query in every model that gives
+    the symbols in `fixed` their values there, trying all values of
+    `symbols`, a list of the others. Stops early, returning True, once
+    the `cancelled` event is set.
+    """
+    low, high = symbols[:CHUNK_BITS], symbols[CHUNK_BITS:]
+    mask = (1 << (1 << len(low))) - 1
+    base = {symbol: symbol_column(i, len(low)) for i, symbol in enumerate(low)}
+    for symbol, value in fixed.items():
+        base[symbol] = mask if value else 0
+
+    # Each chunk fixes the symbols after the first CHUNK_BITS
+    for chunk in range(1 << len(high)):
+        if cancelled is not None and cancelled.is_set():
+            return True
+        columns = dict(base)
+        for i, symbol in enumerate(high):
+            columns[symbol] = mask if chunk >> i & 1 else 0
+        if knowledge.column(columns, mask) & ~query.column(columns, mask) & mask:
+            return False
+    return True
+
+
+# Set in each worker of model_check_parallel once a counterexample is found
+cancelled = None
+
+
+def start_worker(event):
+    global cancelled
+    cancelled = event
+
+
+def check_part(part):
+    knowledge, query, symbols, fixed = part
+    return check_columns(knowledge, query, symbols, fixed, cancelled)
+
+
+def model_check_parallel(knowledge, query, workers=None, split=None):
+    """
+    Checks if knowledge base entails query, like model_check_compiled,
+    with the models split into 2 ** split parts by the values of the
+    first `split` symbols (enough for 4 parts per worker by default),
+    checked on a pool of `workers` processes. Once one part has a
+    counterexample, the others are cancelled.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    workers = workers or os.cpu_count()
+    if split is None:
+        split = (4 * workers - 1).bit_length()
+    split = min(split, len(symbols))
+    fixed, free = symbols[:split], symbols[split:]
+    parts = [
+        (knowledge, query, free,
+         {symbol: bool(values >> i & 1) for i, symbol in enumerate(fixed)})
+        for values in range(1 << split)
+    ]
+
+    event = multiprocessing.Event()
+    pool = multiprocessing.Pool(workers, initializer=start_worker, initargs=(event,))
+    try:
+        for entailed in pool.imap_unordered(check_part, parts):
+            if not entailed:
+                event.set()
+                return False
+        return True
+    finally:
+        pool.close()
+        pool.join()
+
+
+def extend_models(models, symbols, sentence):
+    """
+    Returns (symbols, models) for the models of `sentence` that agree
+    with one of `models`, bitmasks over the list of `symbols`. Symbols
+    of the sentence that are new are appended to the list, each of
+    the models being tried with every assignment to them, evaluated as
+    bit columns.
+    """
+    new = sorted(sentence.symbol_set().difference(symbols))
+    if not new:
+        holds = compile_sentence(sentence, symbols)
+        return symbols, [model for model in models if holds(model)]
+
+    used = [(i, symbol) for i, symbol in enumerate(symbols) if symbol in sentence.symbol_set()]
+    known = len(symbols)
+    low, high = new[:CHUNK_BITS], new[CHUNK_BITS:]
+    mask = (1 << (1 << len(low))) - 1
+    base = {symbol: symbol_column(i, len(low)) for i, symbol in enumerate(low)}
+
+    result = []
+    for model in models:
+        for chunk in range(1 << len(high)):
+            columns = dict(base)
+            for i, symbol in used:
+                columns[symbol] = mask if model >> i & 1 else 0
+            for i, symbol in enumerate(high):
+                columns[symbol] = mask if chunk >> i & 1 else 0
+            column = sentence.column(columns, mask)
+            while column:
+                bit = column & -column
+                column ^= bit
+                assignment = bit.bit_length() - 1 | chunk << len(low)
+                result.append(model | assignment << known)
+    return symbols + new, result
+
+
+class KnowledgeBase():
+    """
+    A knowledge base that facts are added to one at a time, keeping
+    every model of them as a bitmask over self.symbols. Each fact only
+    narrows (or, with new symbols, extends) the models kept so far, and
+    queries are answered from the kept models without enumerating the
+    rest, so it suits puzzles, whose facts leave few models.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.symbols = []
+        self.models = [0]
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds a fact to the knowledge base."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        self.symbols, self.models = extend_models(self.models, self.symbols, sentence)
+
+    def entails(self, query):
+        """Checks if knowledge base entails query."""
+        return self.entails_all([query])[0]
+
+    def entails_all(self, queries):
+        """
+        Returns whether the knowledge base entails each query, checking
+        every query against each kept model in a single pass.
+        """
+        answers = [True] * len(queries)
+        checks = []
+        for n, query in enumerate(queries):
+            Sentence.validate(query)
+            if query.symbol_set().issubset(self.symbols):
+                checks.append((n, compile_sentence(query, self.symbols)))
+            else:
+                # Every model must also satisfy it for any value of its new symbols
+                answers[n] = not extend_models(self.models, self.symbols, Not(query))[1]
+
+        for model in self.models:
+            if not checks:
+                break
+            refuted = [check for check in checks if not check[1](model)]
+            for n, _ in refuted:
+                answers[n] = False
+            if refuted:
+                checks = [check for check in checks if check not in refuted]
+        return answers
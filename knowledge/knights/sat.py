@@ -0,0 +1,232 @@
+"""
+SAT-based entailment for logic.py sentences
+
+model_check(knowledge, query) answers the same question as
+logic.model_check without enumerating models: the knowledge and the
+negated query are converted to CNF with the Tseitin encoding (a fresh
+variable for each compound subsentence, so the clauses grow linearly
+with the sentence), and a DPLL solver with unit propagation over two
+watched literals per clause looks for a model. The knowledge entails
+the query exactly when there is none.
+"""
+
+import collections
+
+from logic import Sentence, Symbol, Not, And, Or, Implication, Biconditional
+
+
+class CNF():
+    """
+    Clauses over integer variables, as in DIMACS: variable v is the
+    literal v, and -v is its negation.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.count = 0
+        self.clauses = []
+        self.literals = {}
+
+    def variable(self, name=None):
+        """Returns the variable of a symbol name, or a fresh one."""
+        if name is not None and name in self.variables:
+            return self.variables[name]
+        self.count += 1
+        if name is not None:
+            self.variables[name] = self.count
+        return self.count
+
+    def add(self, *literals):
+        clause = list(dict.fromkeys(literals))
+        if any(-literal in clause for literal in clause):
+            return
+        self.clauses.append(clause)
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to `sentence`, adding the clauses
+        that define any fresh variable it needs.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        if isinstance(sentence, And):
+            parts = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            v = self.variable()
+            for part in parts:
+                self.add(-v, part)
+            self.add(v, *[-part for part in parts])
+        elif isinstance(sentence, Or):
+            parts = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            v = self.variable()
+            for part in parts:
+                self.add(v, -part)
+            self.add(-v, *parts)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            v = self.variable()
+            self.add(-v, -a, b)
+            self.add(v, a)
+            self.add(v, -b)
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.variable()
+            self.add(-v, -a, b)
+            self.add(-v, a, -b)
+            self.add(v, a, b)
+            self.add(v, -a, -b)
+        else:
+            raise TypeError("must be a logical sentence")
+
+        self.literals[sentence] = v
+        return v
+
+    def assert_true(self, sentence):
+        """
+        Adds clauses that hold exactly when `sentence` is true, without
+        fresh variables for a top-level conjunction or disjunction.
+        """
+        Sentence.validate(sentence)
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.assert_true(conjunct)
+        elif isinstance(sentence, Or):
+            self.add(*[self.literal(disjunct) for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.add(-self.literal(sentence.antecedent), self.literal(sentence.consequent))
+        else:
+            self.add(self.literal(sentence))
+
+
+class Solver():
+    """
+    DPLL with two watched literals per clause: a clause only needs
+    looking at when one of its two watched literals becomes false.
+    """
+
+    def __init__(self, clauses, count):
+        # Indexed by literal, so value[-v] is the last part of the list:
+        # 1 true, -1 false, 0 unassigned
+        self.value = [0] * (2 * count + 1)
+        self.trail = []
+        self.head = 0
+        self.watches = collections.defaultdict(list)
+        self.units = []
+        self.empty = False
+        occurrences = [0] * (count + 1)
+        for clause in clauses:
+            for literal in clause:
+                occurrences[abs(literal)] += 1
+            if not clause:
+                self.empty = True
+            elif len(clause) == 1:
+                self.units.append(clause[0])
+            else:
+                clause = list(clause)
+                self.watches[clause[0]].append(clause)
+                self.watches[clause[1]].append(clause)
+
+        # Branch on the variables in the most clauses first
+        self.order = sorted(range(1, count + 1), key=lambda v: -occurrences[v])
+
+    def assign(self, literal):
+        self.value[literal] = 1
+        self.value[-literal] = -1
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by a unit clause, returning False
+        on a conflict.
+        """
+        value = self.value
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[false]
+            kept = []
+            for n, clause in enumerate(watching):
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if value[clause[0]] == 1:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    if value[clause[k]] != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches[clause[1]].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if value[clause[0]] == -1:
+                        kept.extend(watching[n + 1:])
+                        self.watches[false] = kept
+                        return False
+                    self.assign(clause[0])
+            self.watches[false] = kept
+        return True
+
+    def undo(self, length):
+        while len(self.trail) > length:
+            literal = self.trail.pop()
+            self.value[literal] = self.value[-literal] = 0
+        self.head = length
+
+    def solve(self):
+        """
+        Returns True if the clauses are satisfiable, leaving the model
+        in self.value, or False.
+        """
+        if self.empty:
+            return False
+        for literal in self.units:
+            if self.value[literal] == -1:
+                return False
+            if self.value[literal] == 0:
+                self.assign(literal)
+
+        # Each decision is (trail length before it, literal, flipped)
+        decisions = []
+        while True:
+            if not self.propagate():
+                while decisions and decisions[-1][2]:
+                    decisions.pop()
+                if not decisions:
+                    return False
+                length, literal, _ = decisions.pop()
+                self.undo(length)
+                decisions.append((length, -literal, True))
+                self.assign(-literal)
+                continue
+
+            for v in self.order:
+                if self.value[v] == 0:
+                    decisions.append((len(self.trail), -v, False))
+                    self.assign(-v)
+                    break
+            else:
+                return True
+
+
+def satisfiable(sentence):
+    """
+    Returns a model of the sentence, as a dict from symbol names to
+    booleans, or None if it has none.
+    """
+    cnf = CNF()
+    cnf.assert_true(sentence)
+    solver = Solver(cnf.clauses, cnf.count)
+    if not solver.solve():
+        return None
+    return {name: solver.value[v] == 1 for name, v in cnf.variables.items()}
+
+
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query."""
+    return satisfiable(And(knowledge, Not(query))) is None
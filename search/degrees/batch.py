@@ -0,0 +1,152 @@
+"""
+Batch shortest-path queries for degrees.
+
+Usage: python batch.py directory [queries] [--workers N] [--snapshot]
+                        [--resolve connections|birth] [--stats FILE]
+
+Reads one query per line, a source and a target name separated by a
+tab, from `queries` or stdin, and writes one JSON object per query to
+stdout in input order, as soon as each is answered.
+
+The graph is loaded once in the parent process before the worker pool
+is forked, so every worker shares it copy-on-write (or, with
+--snapshot, through the same read-only memory mapping) instead of
+loading its own copy. Pairs in different connected components are
+answered from the graph's component labels without a search.
+
+Names shared by several people, or matching nobody exactly, are
+reported as errors unless --resolve gives a rule for
+degrees.person_id_for_name to pick one by.
+
+With --stats, the stats.SearchStats of each query that was searched is
+written to FILE as a line of JSON, in the same order as the answers.
+"""
+
+import argparse
+import functools
+import json
+import multiprocessing
+import sys
+
+import degrees
+
+
+def parse(line):
+    """
+    Returns the (source, target) names of a query line, or None if
+    the line is blank.
+    """
+    line = line.rstrip("\n")
+    if not line.strip():
+        return None
+    fields = line.split("\t")
+    if len(fields) != 2:
+        return (line, None)
+    return (fields[0].strip(), fields[1].strip())
+
+
+def resolve(name, rule=None):
+    """
+    Returns (person_id, error) for a name. Without a rule, refuses to
+    guess between people who share it.
+    """
+    if rule is not None:
+        person_id = degrees.person_id_for_name(name, rule)
+        if person_id is None:
+            return None, f"person not found: {name}"
+        return person_id, None
+
+    person_ids = degrees.person_ids_for_name(name)
+    if len(person_ids) == 0:
+        return None, f"person not found: {name}"
+    if len(person_ids) > 1:
+        return None, f"ambiguous name: {name} ({', '.join(sorted(person_ids))})"
+    return person_ids[0], None
+
+
+def answer(query, rule=None, with_stats=False):
+    """
+    Answers one (source, target) query as a dict ready for JSON,
+    including its search stats under "stats" if `with_stats`.
+    """
+    source_name, target_name = query
+    result = {"source": source_name, "target": target_name}
+    if target_name is None:
+        result["error"] = "expected a source and a target separated by a tab"
+        return result
+
+    source, error = resolve(source_name, rule)
+    if error is None:
+        target, error = resolve(target_name, rule)
+    if error is not None:
+        result["error"] = error
+        return result
+
+    if with_stats:
+        path, stats = degrees.shortest_path(source, target, stats=True)
+        result["stats"] = stats.as_dict()
+    else:
+        path = degrees.shortest_path(source, target)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [
+            {"movie": degrees.get_movie(movie_id)["title"],
+             "person": degrees.get_person(person_id)["name"]}
+            for movie_id, person_id in path
+        ]
+    return result
+
+
+def run(queries, out, workers=None, chunksize=64, rule=None, stats_out=None):
+    """
+    Answers an iterable of (source, target) name pairs across a pool of
+    `workers` forked processes, writing JSON lines to `out` in order,
+    and per-query stats to `stats_out` if given.
+    Data must already be loaded with degrees.load_data.
+    """
+    answer_query = functools.partial(answer, rule=rule, with_stats=stats_out is not None)
+    if workers == 1:
+        for query in queries:
+            write(answer_query(query), out, stats_out)
+        return
+
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        for result in pool.imap(answer_query, queries, chunksize):
+            write(result, out, stats_out)
+
+
+def write(result, out, stats_out):
+    stats = result.pop("stats", None)
+    out.write(json.dumps(result) + "\n")
+    if stats is not None:
+        stats_out.write(json.dumps(stats) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("queries", nargs="?")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--snapshot", action="store_true")
+    parser.add_argument("--resolve", choices=degrees.RULES)
+    parser.add_argument("--stats", metavar="FILE")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, compact=True, cache=args.snapshot,
+                      progress=degrees.print_progress)
+
+    stats_out = open(args.stats, "w", encoding="utf-8") if args.stats else None
+    f = open(args.queries, encoding="utf-8") if args.queries else sys.stdin
+    with f:
+        queries = (query for query in map(parse, f) if query is not None)
+        run(queries, sys.stdout, args.workers, rule=args.resolve, stats_out=stats_out)
+    if stats_out is not None:
+        stats_out.close()
+
+
+if __name__ == "__main__":
+    main()
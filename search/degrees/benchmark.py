@@ -0,0 +1,262 @@
+"""
+Benchmarks for the degrees search.
+
+Usage: python benchmark.py [directory] [--pairs N] [--seed S]
+       python benchmark.py --synthetic PEOPLE [--pairs N] [--seed S]
+       python benchmark.py --frontier NODES
+       python benchmark.py [directory | --synthetic PEOPLE] --load
+       python benchmark.py [directory | --synthetic PEOPLE] --paths HUBS
+
+With --synthetic a random dataset with PEOPLE people is written to a
+temporary directory and used instead of a CSV directory on disk.
+With --frontier only the frontier classes in util.py are benchmarked.
+With --load the dict and compact loaders are compared instead of searches.
+With --paths all shortest paths are enumerated between the HUBS most
+connected people, where the number of paths explodes.
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import degrees
+import util
+
+
+def generate_dataset(directory, n_people, seed=0, cast_size=8):
+    """
+    Writes a random people.csv / movies.csv / stars.csv into `directory`.
+    Casts are drawn with a bias toward low ids so that a few hub actors
+    appear in many movies, like in the IMDb data.
+    """
+    rng = random.Random(seed)
+    n_movies = max(1, n_people // 2)
+    with open(os.path.join(directory, "people.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(n_people):
+            writer.writerow([i, f"Person {i}", 1900 + i % 100])
+    with open(os.path.join(directory, "movies.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(n_movies):
+            writer.writerow([i, f"Movie {i}", 1950 + i % 70])
+    with open(os.path.join(directory, "stars.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie_id in range(n_movies):
+            cast = {int(n_people * rng.random() ** 2) for _ in range(cast_size)}
+            for person_id in cast:
+                writer.writerow([person_id, movie_id])
+
+
+def count_expansions():
+    """
+    Wraps degrees.neighbors_for_person so every call is counted.
+    Returns the counter; reset it with counter[0] = 0.
+    """
+    counter = [0]
+    neighbors = degrees.neighbors_for_person
+
+    def counted(person_id):
+        counter[0] += 1
+        return neighbors(person_id)
+
+    degrees.neighbors_for_person = counted
+    return counter
+
+
+def random_pairs(n, seed):
+    rng = random.Random(seed)
+    ids = sorted(degrees.people)
+    return [(rng.choice(ids), rng.choice(ids)) for _ in range(n)]
+
+
+def run(label, search, pairs, counter):
+    counter[0] = 0
+    degrees.cached_neighbors.cache_clear()
+    lengths = []
+    start = time.perf_counter()
+    for source, target in pairs:
+        path = search(source, target)
+        lengths.append(None if path is None else len(path))
+    elapsed = time.perf_counter() - start
+    print(f"{label:15} expanded {counter[0]:10}  "
+          f"time {elapsed:8.3f}s  ({elapsed / len(pairs) * 1000:.3f} ms/query)")
+    info = degrees.cached_neighbors.cache_info()
+    print(f"{'':15} neighbor cache hits {info.hits}, misses {info.misses}")
+    return lengths
+
+
+def benchmark_search(directory, pairs):
+    counter = count_expansions()
+    old = run("bfs", degrees.bfs, pairs, counter)
+    new = run("bidirectional", degrees.bidirectional_bfs, pairs, counter)
+    if old != new:
+        print("WARNING: path lengths differ between searches")
+
+    graph = degrees.Graph.load(directory)
+    start = time.perf_counter()
+    compact = [graph.bfs(graph.person_index[source], graph.person_index[target])
+               for source, target in pairs]
+    elapsed = time.perf_counter() - start
+    print(f"{'compact':15} {'':19}  "
+          f"time {elapsed:8.3f}s  ({elapsed / len(pairs) * 1000:.3f} ms/query)")
+    if new != [None if path is None else len(path) for path in compact]:
+        print("WARNING: path lengths differ between searches")
+
+    start = time.perf_counter()
+    index = degrees.Landmarks(graph, 16)
+    elapsed = time.perf_counter() - start
+    rejected = exact = 0
+    for (source, target), length in zip(pairs, new):
+        lower, upper = index.bounds(graph.person_index[source], graph.person_index[target])
+        if lower is None:
+            rejected += 1
+            if length is not None:
+                print("WARNING: landmarks rejected a connected pair")
+        elif length is not None and lower == upper:
+            exact += 1
+    print(f"{'landmarks':15} built in {elapsed:.3f}s  "
+          f"rejected {rejected} disconnected, {exact} exact distances")
+
+
+def benchmark_paths(directory, hubs, limit=100000, k=50):
+    """
+    Enumerates up to `limit` shortest paths, and the `k` shortest
+    paths, between every pair of the `hubs` most connected people.
+    """
+    degrees.load_data(directory, compact=True)
+    graph = degrees.graph
+    people = sorted(range(len(graph.person_ids)),
+                    key=lambda p: -graph.connections(p))[:hubs]
+    for source, target in itertools.combinations(people, 2):
+        source, target = graph.person_ids[source], graph.person_ids[target]
+
+        start = time.perf_counter()
+        found = graph.all_shortest_paths(source, target)
+        first = next(found, None)
+        to_first = time.perf_counter() - start
+        count = sum(1 for _ in itertools.islice(found, limit - 1)) + (first is not None)
+        to_all = time.perf_counter() - start
+
+        start = time.perf_counter()
+        lengths = [len(path) for path in graph.k_shortest_paths(source, target, k)]
+        to_k = time.perf_counter() - start
+
+        print(f"{source:>10} {target:>10}  "
+              f"{count:{len(str(limit))}}{'+' if count == limit else ' '} shortest paths "
+              f"(first {to_first * 1000:.2f} ms, all {to_all * 1000:.2f} ms)  "
+              f"{len(lengths)} shortest of length {min(lengths, default=0)}-{max(lengths, default=0)} "
+              f"in {to_k * 1000:.2f} ms")
+
+
+def clear_data():
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.graph = None
+
+
+def measure_load(label, load):
+    """
+    Times `load` once untraced, then again under tracemalloc to
+    measure the memory held by what it loaded.
+    """
+    clear_data()
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+
+    clear_data()
+    tracemalloc.start()
+    load()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:15} load {elapsed:8.3f}s  "
+          f"memory {current / 2**20:9.1f} MiB  (peak {peak / 2**20:.1f} MiB)")
+
+
+def benchmark_load(directory):
+    path = os.path.join(tempfile.gettempdir(), "benchmark.snapshot")
+    measure_load("dicts", lambda: degrees.load_data(directory))
+    measure_load("compact", lambda: degrees.load_data(directory, compact=True))
+    degrees.snapshot.write(degrees.Graph.load(directory), path, directory)
+    measure_load("snapshot", lambda: setattr(
+        degrees, "graph", degrees.snapshot.load(directory, path)))
+    os.remove(path)
+    clear_data()
+
+
+def benchmark_frontier(frontier_class, n, contains_every=10):
+    """
+    Pushes n nodes, checking contains_state every few pushes, then pops
+    them all. Returns the elapsed time in seconds.
+    """
+    frontier = frontier_class()
+    start = time.perf_counter()
+    for i in range(n):
+        frontier.add(util.Node(i, None, None))
+        if i % contains_every == 0:
+            frontier.contains_state(i // 2)
+    while not frontier.empty():
+        frontier.remove()
+    return time.perf_counter() - start
+
+
+def benchmark_frontiers(n, list_limit=20000):
+    """
+    The list-backed frontiers are quadratic, so they are only run up to
+    `list_limit` nodes; compare them per operation.
+    """
+    for frontier_class in (util.StackFrontier, util.QueueFrontier,
+                           util.DequeStackFrontier, util.DequeQueueFrontier):
+        size = n
+        if frontier_class in (util.StackFrontier, util.QueueFrontier):
+            size = min(n, list_limit)
+        elapsed = benchmark_frontier(frontier_class, size)
+        print(f"{frontier_class.__name__:20} {size:10} nodes  "
+              f"time {elapsed:8.3f}s  ({elapsed / size * 1e9:.0f} ns/node)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", nargs="?", default="small")
+    parser.add_argument("--synthetic", type=int, metavar="PEOPLE")
+    parser.add_argument("--pairs", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frontier", type=int, metavar="NODES")
+    parser.add_argument("--load", action="store_true")
+    parser.add_argument("--paths", type=int, metavar="HUBS")
+    args = parser.parse_args()
+
+    if args.frontier:
+        benchmark_frontiers(args.frontier)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.directory
+        if args.synthetic:
+            generate_dataset(tmp, args.synthetic, args.seed)
+            directory = tmp
+
+        if args.load:
+            benchmark_load(directory)
+            return
+        if args.paths:
+            benchmark_paths(directory, args.paths)
+            return
+
+        degrees.load_data(directory)
+        print(f"{len(degrees.people)} people, {len(degrees.movies)} movies, "
+              f"{args.pairs} random pairs")
+        benchmark_search(directory, random_pairs(args.pairs, args.seed))
+
+
+if __name__ == "__main__":
+    main()
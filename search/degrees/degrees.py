@@ -1,6 +1,14 @@
 import csv
+import functools
 import sys
+import time
 
+import paths
+import snapshot
+from graph import Graph, print_progress
+from landmarks import Landmarks
+from nameindex import NameIndex
+from stats import SearchStats
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,11 +20,56 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, used instead of the dicts above when set
+graph = None
 
-def load_data(directory):
+# Optional landmarks.Landmarks over `graph`, for distance_bounds
+landmarks = None
+
+# Number of people whose neighbor sets are kept by neighbors_for_person
+NEIGHBOR_CACHE_SIZE = 4096
+
+# NameIndex over `names`, built on first use by get_name_index
+name_index = None
+
+# Ways person_id_for_name can pick between people sharing a name
+RULES = ("connections", "birth")
+
+# Edits allowed when person_id_for_name falls back to fuzzy matching
+FUZZY_DISTANCE = 2
+
+# Seconds spent loading the data and building indexes over it
+timings = {"load": 0.0, "index": 0.0}
+
+# Called with the SearchStats of every shortest_path asked for stats
+stats_hook = None
+
+
+def load_data(directory, compact=False, cache=False, progress=None):
     """
     Load data from CSV files into memory.
+
+    With `compact`, build a `graph.Graph` instead of the three dicts,
+    streaming the CSVs in chunks and reporting to `progress` (see
+    Graph.load). With `cache`, map that Graph from the directory's
+    binary snapshot, compiling the snapshot first if it is missing or
+    stale.
     """
+    global graph, landmarks, name_index
+    cached_neighbors.cache_clear()
+    landmarks = None
+    name_index = None
+    start = time.perf_counter()
+    if cache or compact:
+        if cache:
+            graph = snapshot.load(directory, progress=progress)
+        else:
+            graph = Graph.load(directory, progress)
+        timings.update(graph.timings)
+        timings["load"] = time.perf_counter() - start - timings["index"]
+        return
+    graph = None
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,6 +104,9 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    timings["load"] = time.perf_counter() - start
+    timings["index"] = 0.0
+
 def display(names , movies , people) -> None:
     print(" ===================================" )
     print("actor"+" "*10, "actor id" + " "*10)
@@ -68,15 +124,21 @@ def display(names , movies , people) -> None:
         print(f"{k:10}  {str(v):10}")
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    args = sys.argv[1:]
+    flags = {arg for arg in args if arg.startswith("--")}
+    args = [arg for arg in args if arg not in flags]
+    if len(args) > 1 or flags - {"--compact", "--snapshot"}:
+        sys.exit("Usage: python degrees.py [--compact] [--snapshot] [directory]")
+    directory = args[0] if len(args) == 1 else "large"
+    compact = "--compact" in flags
+    cache = "--snapshot" in flags
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact, cache, print_progress)
     print("Data loaded.")
-    display(names, movies , people)
+    if not (compact or cache):
+        display(names, movies , people)
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -94,19 +156,21 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = get_person(path[i][1])["name"]
+            person2 = get_person(path[i + 1][1])["name"]
+            movie = get_movie(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
 
-def bfs(st:int , dest:int) -> list:
+def bfs(st:int , dest:int, stats=None) -> list:
     if st == dest:
         return []
     import copy
     queue = QueueFrontier()
     neighbours = neighbors_for_person(st)
+    if stats is not None:
+        stats.expand(len(neighbours))
     # init
     mark = set()
     for item in neighbours:
@@ -114,6 +178,8 @@ def bfs(st:int , dest:int) -> list:
         mark.add(item[1])
     
     while not queue.empty():
+        if stats is not None:
+            stats.frontier(len(queue.frontier))
         # get head
         node_list = queue.remove()
         movie_id , actor_id = node_list[-1]
@@ -121,6 +187,8 @@ def bfs(st:int , dest:int) -> list:
             return node_list
         # get related actor
         neighbours = neighbors_for_person(actor_id)
+        if stats is not None:
+            stats.expand(len(neighbours))
         for item in neighbours:
             if item[1] in mark:
                 continue
@@ -135,30 +203,157 @@ def bfs(st:int , dest:int) -> list:
             
 
 
-def shortest_path(source, target):
+def bidirectional_bfs(source, target, stats=None):
+    """
+    Breadth-first search from both ends at once, expanding whichever
+    frontier is smaller one whole layer at a time, until the two meet.
+
+    Visited people are kept as `Node`s with parent pointers (state is a
+    person_id, action the movie_id joining it to its parent), so no path
+    list is copied until the final path is rebuilt.
+    """
+    if source == target:
+        return []
+
+    forward = {source: Node(source, None, None)}
+    backward = {target: Node(target, None, None)}
+    forward_layer = [forward[source]]
+    backward_layer = [backward[target]]
+    if stats is not None:
+        stats.frontier(2)
+
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            visited, other = forward, backward
+            layer = forward_layer
+        else:
+            visited, other = backward, forward
+            layer = backward_layer
+
+        next_layer = []
+        for node in layer:
+            neighbors = neighbors_for_person(node.state)
+            if stats is not None:
+                stats.expand(len(neighbors))
+            for movie_id, person_id in neighbors:
+                if person_id in visited:
+                    continue
+                child = Node(person_id, node, movie_id)
+                if person_id in other:
+                    # Every meeting found while expanding a full layer
+                    # has the same length, so the first one is shortest
+                    if visited is forward:
+                        return join_path(child, other[person_id])
+                    return join_path(other[person_id], child)
+                visited[person_id] = child
+                next_layer.append(child)
+
+        if visited is forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+        if stats is not None:
+            stats.frontier(len(forward_layer) + len(backward_layer))
+
+    return None
+
+
+def join_path(forward_node, backward_node):
+    """
+    Joins a node of the source-side tree and a node of the target-side
+    tree that share a person into a list of (movie_id, person_id) pairs.
+    """
+    path = []
+    node = forward_node
+    while node.parent is not None:
+        path.append((node.action, node.state))
+        node = node.parent
+    path.reverse()
+
+    node = backward_node
+    while node.parent is not None:
+        path.append((node.action, node.parent.state))
+        node = node.parent
+    return path
+
+
+def shortest_path(source, target, bidirectional=True, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
-    If no possible path, returns None.
+    If no possible path, returns None. With the compact graph loaded,
+    people in different components are answered without a search.
+
+    If `stats` is True (or a SearchStats to fill in), returns a
+    (path, stats) pair instead, and passes the stats to stats_hook.
     """
-    return bfs(source ,target)
-    # TODO
-    raise NotImplementedError
+    if stats is None or stats is False:
+        return search(source, target, bidirectional)
 
+    if stats is True:
+        stats = SearchStats(source, target)
+    stats.timings.update(timings)
+    with stats.timed("search"):
+        path = search(source, target, bidirectional, stats)
+    stats.finish(path)
+    if stats_hook is not None:
+        stats_hook(stats)
+    return path, stats
 
-def person_id_for_name(name):
+
+def search(source, target, bidirectional=True, stats=None):
+    if graph is not None:
+        return graph.shortest_path(source, target, stats)
+    if bidirectional:
+        return bidirectional_bfs(source, target, stats)
+    return bfs(source ,target, stats)
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, one at a time.
+    """
+    if graph is not None:
+        return graph.all_shortest_paths(source, target)
+    return paths.all_shortest_paths(neighbors_for_person, source, target)
+
+
+def k_shortest_paths(source, target, k=None):
+    """
+    Yields up to k lists of (movie_id, person_id) pairs that connect
+    the source to the target without repeating a person, shortest
+    first: all of the shortest paths, then longer ones.
+    """
+    if graph is not None:
+        return graph.k_shortest_paths(source, target, k)
+    return paths.k_shortest_paths(neighbors_for_person, source, target, k)
+
+
+def person_id_for_name(name, rule=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Without a `rule` the user is asked which person was meant. With one
+    of RULES nothing is read from stdin: choose_person picks between
+    people sharing the name, and a name matching nobody falls back to
+    the closest names within FUZZY_DISTANCE edits.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
+    if len(person_ids) == 0 and rule is not None:
+        matches = fuzzy_person_ids(name, FUZZY_DISTANCE)
+        person_ids = [person_id for distance, person_id in matches
+                      if distance == matches[0][0]]
     if len(person_ids) == 0:
         return None
+    elif len(person_ids) > 1 and rule is not None:
+        return choose_person(person_ids, rule)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = get_person(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -173,19 +368,161 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name):
+    """
+    Returns every IMDB id for a person's name, without asking.
+    """
+    if graph is not None:
+        return graph.person_ids_for_name(name)
+    return list(names.get(name.lower(), set()))
+
+
+def get_name_index():
+    """
+    Returns a NameIndex of person_ids (or of person indexes, when the
+    compact graph is loaded).
+    """
+    global name_index
+    if graph is not None:
+        if graph.name_index is None:
+            start = time.perf_counter()
+            graph.sorted_names()
+            timings["index"] += time.perf_counter() - start
+        return graph.sorted_names()
+    if name_index is None:
+        start = time.perf_counter()
+        name_index = NameIndex.from_dict(names)
+        timings["index"] += time.perf_counter() - start
+    return name_index
+
+
+def prefix_person_ids(prefix, limit=None):
+    """
+    Returns the IMDB ids of people whose name starts with `prefix`.
+    """
+    found = get_name_index().prefix(prefix, limit)
+    if graph is not None:
+        return [graph.person_ids[person] for person in found]
+    return found
+
+
+def fuzzy_person_ids(name, max_distance=FUZZY_DISTANCE):
+    """
+    Returns (edit distance, IMDB id) pairs for people whose name is
+    within `max_distance` edits of `name`, closest first.
+    """
+    found = get_name_index().fuzzy(name, max_distance)
+    if graph is not None:
+        return [(distance, graph.person_ids[person]) for distance, person in found]
+    return found
+
+
+def choose_person(person_ids, rule="connections"):
+    """
+    Deterministically picks one of several person_ids: by "connections"
+    the one with most co-star pairs, then the earliest born; by "birth"
+    the earliest born, then the most connected. Remaining ties go to
+    the smallest id.
+    """
+    if rule not in RULES:
+        raise ValueError(f"unknown rule {rule!r}, expected one of {RULES}")
+
+    def key(person_id):
+        birth = get_person(person_id)["birth"]
+        birth = int(birth) if birth.isdigit() else float("inf")
+        connections = -count_connections(person_id)
+        if rule == "birth":
+            return (birth, connections, person_id)
+        return (connections, birth, person_id)
+
+    return min(person_ids, key=key)
+
+
+def count_connections(person_id):
+    """
+    Returns the number of (movie, co-star) pairs of a person.
+    """
+    if graph is not None:
+        return graph.connections(graph.person_index[person_id])
+    return sum(len(movies[movie_id]["stars"]) for movie_id in people[person_id]["movies"])
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
+
+    Results are shared through a bounded LRU cache, see
+    set_neighbor_cache; cached_neighbors.cache_info() has the hit and
+    miss counts.
     """
+    return cached_neighbors(person_id)
+
+
+def load_neighbors(person_id):
+    if graph is not None:
+        return frozenset(graph.neighbors_for_person(person_id))
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
         for person_id in movies[movie_id]["stars"]:
             neighbors.add((movie_id, person_id))
-    return neighbors
+    return frozenset(neighbors)
+
+
+cached_neighbors = functools.lru_cache(maxsize=NEIGHBOR_CACHE_SIZE)(load_neighbors)
+
+
+def set_neighbor_cache(maxsize):
+    """
+    Replaces the neighbor cache with an empty one holding at most
+    `maxsize` people (0 disables caching, None makes it unbounded).
+    """
+    global cached_neighbors
+    cached_neighbors = functools.lru_cache(maxsize=maxsize)(load_neighbors)
+
+
+def build_landmarks(k):
+    """
+    Indexes BFS distances from the k most connected people of the
+    compact graph, for bounds on the degrees between any two people.
+    """
+    global landmarks
+    if graph is None:
+        raise RuntimeError("landmarks need data loaded with compact=True")
+    landmarks = Landmarks(graph, k)
+    return landmarks
 
 
+def distance_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees between two person_ids
+    from the index built by build_landmarks, without searching. upper
+    is None when no landmark reaches both, and both are None when the
+    two are not connected.
+    """
+    if landmarks is None:
+        raise RuntimeError("call build_landmarks first")
+    return landmarks.bounds(graph.person_index[source], graph.person_index[target])
+
+
+def get_person(person_id):
+    """
+    Returns the name and birth of a person from whichever store is loaded.
+    """
+    if graph is not None:
+        return graph.person(person_id)
+    return people[person_id]
+
+
+def get_movie(movie_id):
+    """
+    Returns the title and year of a movie from whichever store is loaded.
+    """
+    if graph is not None:
+        return graph.movie(movie_id)
+    return movies[movie_id]
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,402 @@
+"""
+Compact actor-movie graph for degrees.
+
+Person and movie ids are interned to dense ints and the bipartite
+person <-> movie graph is stored in compressed-sparse-row form: for
+person p, its movies are movie_of[person_start[p]:person_start[p + 1]],
+and likewise for the stars of a movie. All four are `array`s of machine
+ints, so the graph costs a few bytes per edge instead of a set entry
+and a string per edge in each direction.
+
+Each person also gets a connected-component label, found by union-find
+over the casts of every movie, so two people in different components
+are known to be unconnected without any search.
+"""
+
+import csv
+import itertools
+import operator
+import sys
+import time
+from array import array
+
+import paths
+from nameindex import NameIndex
+
+# Rows parsed between progress reports by Graph.load
+CHUNK_SIZE = 1 << 16
+
+
+class Graph():
+    def __init__(self):
+        # person index -> IMDb id / name / birth, and the reverse for ids
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+        self.person_index = {}
+
+        # movie index -> IMDb id / title / year, and the reverse for ids
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+        self.movie_index = {}
+
+        # lowercase name -> person index, or a tuple of them if ambiguous
+        self.names = {}
+
+        # NameIndex over `names`, built on first use by sorted_names
+        self.name_index = None
+
+        # CSR adjacency in both directions
+        self.person_start = array("l", [0])
+        self.movie_of = array("l")
+        self.movie_start = array("l", [0])
+        self.star_of = array("l")
+
+        # person index -> connected component label
+        self.component = array("l")
+
+        # Seconds spent by Graph.load parsing CSVs and building indexes
+        self.timings = {"load": 0.0, "index": 0.0}
+
+    @classmethod
+    def load(cls, directory, progress=None, chunk_size=CHUNK_SIZE):
+        """
+        Load people.csv, movies.csv and stars.csv from `directory`.
+        Rows of stars.csv naming an unknown person or movie are skipped.
+
+        Files are streamed `chunk_size` rows at a time, calling
+        `progress(path, rows, skipped, seconds)` after each chunk and
+        once more with done=True at the end of each file.
+        """
+        graph = cls()
+        start = time.perf_counter()
+
+        path = f"{directory}/people.csv"
+        for chunk in read_chunks(path, ("id", "name", "birth"), chunk_size, progress):
+            for person_id, name, birth in chunk:
+                graph.add_person(person_id, name, birth)
+
+        path = f"{directory}/movies.csv"
+        for chunk in read_chunks(path, ("id", "title", "year"), chunk_size, progress):
+            for movie_id, title, year in chunk:
+                graph.add_movie(movie_id, title, year)
+
+        people = array("l")
+        movies = array("l")
+        person_index = graph.person_index
+        movie_index = graph.movie_index
+        path = f"{directory}/stars.csv"
+        for chunk in read_chunks(path, ("person_id", "movie_id"), chunk_size, progress):
+            for person_id, movie_id in chunk:
+                person = person_index.get(person_id)
+                movie = movie_index.get(movie_id)
+                if person is None or movie is None:
+                    chunk.skipped += 1
+                    continue
+                people.append(person)
+                movies.append(movie)
+
+        built = time.perf_counter()
+        graph.build(people, movies)
+        graph.timings["load"] = built - start
+        graph.timings["index"] = time.perf_counter() - built
+        return graph
+
+    def add_person(self, person_id, name, birth):
+        index = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self.person_index[person_id] = index
+        self.name_index = None
+
+        key = name.lower()
+        other = self.names.get(key)
+        if other is None:
+            self.names[key] = index
+        elif isinstance(other, tuple):
+            self.names[key] = other + (index,)
+        else:
+            self.names[key] = (other, index)
+        return index
+
+    def add_movie(self, movie_id, title, year):
+        index = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        self.movie_index[movie_id] = index
+        return index
+
+    def build(self, people, movies):
+        """
+        Build both CSR directions from parallel arrays of
+        (person index, movie index) edges.
+        """
+        self.person_start, self.movie_of = csr(len(self.person_ids), people, movies)
+        self.movie_start, self.star_of = csr(len(self.movie_ids), movies, people)
+        self.component = components(len(self.person_ids), self.movie_start, self.star_of)
+
+    def sorted_names(self):
+        """
+        Returns a NameIndex of person indexes, for prefix and fuzzy
+        name lookups.
+        """
+        if self.name_index is None:
+            self.name_index = NameIndex.from_dict(self.names)
+        return self.name_index
+
+    def connections(self, person):
+        """
+        Returns the number of (movie, co-star) pairs of a person index,
+        counting themselves once per movie.
+        """
+        movie_start = self.movie_start
+        return sum(
+            movie_start[movie + 1] - movie_start[movie]
+            for movie in self.movie_of[self.person_start[person]:self.person_start[person + 1]]
+        )
+
+    def neighbors(self, person):
+        """
+        Yields (movie index, person index) pairs for people
+        who starred with a given person index.
+        """
+        movie_of = self.movie_of
+        movie_start = self.movie_start
+        star_of = self.star_of
+        for i in range(self.person_start[person], self.person_start[person + 1]):
+            movie = movie_of[i]
+            for j in range(movie_start[movie], movie_start[movie + 1]):
+                yield movie, star_of[j]
+
+    def bfs(self, source, target, stats=None):
+        """
+        Bidirectional breadth-first search between two person indexes.
+        Returns a list of (movie index, person index) pairs, or None.
+        Work done is counted into `stats`, a stats.SearchStats, if given.
+        """
+        if source == target:
+            return []
+        if self.component[source] != self.component[target]:
+            return None
+
+        # person index -> (parent person index, movie joining them)
+        forward = {source: None}
+        backward = {target: None}
+        forward_layer = [source]
+        backward_layer = [target]
+        if stats is not None:
+            stats.frontier(2)
+
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                visited, other = forward, backward
+                layer = forward_layer
+            else:
+                visited, other = backward, forward
+                layer = backward_layer
+
+            next_layer = []
+            for person in layer:
+                generated = 0
+                for movie, neighbor in self.neighbors(person):
+                    generated += 1
+                    if neighbor in visited:
+                        continue
+                    visited[neighbor] = (person, movie)
+                    if neighbor in other:
+                        if stats is not None:
+                            stats.expand(generated)
+                        return self.join_path(forward, backward, neighbor)
+                    next_layer.append(neighbor)
+                if stats is not None:
+                    stats.expand(generated)
+
+            if visited is forward:
+                forward_layer = next_layer
+            else:
+                backward_layer = next_layer
+            if stats is not None:
+                stats.frontier(len(forward_layer) + len(backward_layer))
+
+        return None
+
+    def connected(self, source, target):
+        """Returns whether two person indexes are in the same component."""
+        return self.component[source] == self.component[target]
+
+    def join_path(self, forward, backward, meeting):
+        path = []
+        person = meeting
+        while forward[person] is not None:
+            parent, movie = forward[person]
+            path.append((movie, person))
+            person = parent
+        path.reverse()
+
+        person = meeting
+        while backward[person] is not None:
+            parent, movie = backward[person]
+            path.append((movie, parent))
+            person = parent
+        return path
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return {
+            (self.movie_ids[movie], self.person_ids[person])
+            for movie, person in self.neighbors(self.person_index[person_id])
+        }
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, or None.
+        """
+        path = self.bfs(self.person_index[source], self.person_index[target], stats)
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+    def all_shortest_paths(self, source, target):
+        """
+        Yields every shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+        """
+        yield from self.paths(paths.all_shortest_paths, source, target)
+
+    def k_shortest_paths(self, source, target, k=None):
+        """
+        Yields up to k loopless lists of (movie_id, person_id) pairs
+        that connect the source to the target, shortest first.
+        """
+        yield from self.paths(paths.k_shortest_paths, source, target, k)
+
+    def paths(self, enumerate_paths, source, target, *args):
+        source = self.person_index[source]
+        target = self.person_index[target]
+        if not self.connected(source, target):
+            return
+        for path in enumerate_paths(self.neighbors, source, target, *args):
+            yield [(self.movie_ids[movie], self.person_ids[person])
+                   for movie, person in path]
+
+    def person_ids_for_name(self, name):
+        """Returns the list of person_ids with a given (any case) name."""
+        found = self.names.get(name.lower())
+        if found is None:
+            return []
+        if not isinstance(found, tuple):
+            found = (found,)
+        return [self.person_ids[person] for person in found]
+
+    def person(self, person_id):
+        """Returns name and birth of a person, like an entry of degrees.people."""
+        index = self.person_index[person_id]
+        return {"name": self.person_names[index], "birth": self.person_births[index]}
+
+    def movie(self, movie_id):
+        """Returns title and year of a movie, like an entry of degrees.movies."""
+        index = self.movie_index[movie_id]
+        return {"title": self.movie_titles[index], "year": self.movie_years[index]}
+
+
+def csr(n, rows, cols):
+    """
+    Counting-sort parallel arrays of (row, col) edges into CSR form.
+    Returns (start, values) with row r's cols in values[start[r]:start[r + 1]],
+    sorted and each only once, as a repeated edge is one edge.
+    """
+    start = array("l", [0]) * (n + 1)
+    for row in rows:
+        start[row + 1] += 1
+    for i in range(n):
+        start[i + 1] += start[i]
+
+    fill = array("l", start[:-1])
+    values = array("l", [0]) * len(rows)
+    for row, col in zip(rows, cols):
+        values[fill[row]] = col
+        fill[row] += 1
+
+    unique = array("l")
+    unique_start = array("l", [0]) * (n + 1)
+    for row in range(n):
+        unique.extend(sorted(set(values[start[row]:start[row + 1]])))
+        unique_start[row + 1] = len(unique)
+    return unique_start, unique
+
+
+def components(n, start, members):
+    """
+    Union-find over groups in CSR form (group g is
+    members[start[g]:start[g + 1]]), returning an array labelling each
+    of the n members with a dense component number.
+    """
+    parent = array("l", range(n))
+
+    def find(x):
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    for group in range(len(start) - 1):
+        first = None
+        for i in range(start[group], start[group + 1]):
+            root = find(members[i])
+            if first is None:
+                first = root
+            elif root != first:
+                parent[root] = first
+
+    label = array("l", [0]) * n
+    roots = {}
+    for x in range(n):
+        label[x] = roots.setdefault(find(x), len(roots))
+    return label
+
+
+class Chunk(list):
+    """A list of rows, counting how many of them were skipped."""
+    skipped = 0
+
+
+def read_chunks(path, columns, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Yields the named `columns` of a CSV file as lists of tuples of at
+    most `chunk_size` rows, so only one chunk is in memory at a time.
+    Uses csv.reader and positional columns rather than a DictReader.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        pick = operator.itemgetter(*(header.index(column) for column in columns))
+        rows = skipped = 0
+        start = time.perf_counter()
+        while True:
+            chunk = Chunk(map(pick, itertools.islice(reader, chunk_size)))
+            if not chunk:
+                break
+            yield chunk
+            rows += len(chunk)
+            skipped += chunk.skipped
+            if progress is not None:
+                progress(path, rows, skipped, time.perf_counter() - start)
+        if progress is not None:
+            progress(path, rows, skipped, time.perf_counter() - start, done=True)
+
+
+def print_progress(path, rows, skipped, seconds, done=False):
+    """A `progress` callback for Graph.load that reports to stderr."""
+    rate = rows / seconds if seconds else 0
+    print(f"\r{path}: {rows:,} rows ({skipped:,} skipped), {rate:,.0f} rows/s",
+          end="\n" if done else "", file=sys.stderr, flush=True)
@@ -0,0 +1,81 @@
+"""
+Landmark distance index for degrees.
+
+BFS distances from the k most connected people ("landmarks") to every
+person give, by the triangle inequality, bounds on the distance between
+any two people:
+
+    max |d(L, s) - d(L, t)|  <=  d(s, t)  <=  min d(L, s) + d(L, t)
+
+and if some landmark reaches exactly one of s and t, they are in
+different components and cannot be connected at all.
+"""
+
+from array import array
+
+# Stored in place of a distance for people a landmark cannot reach
+UNREACHABLE = -1
+
+
+class Landmarks():
+    def __init__(self, graph, k=16):
+        """
+        Runs one BFS over `graph` (a graph.Graph) from each of its
+        k most connected people.
+        """
+        self.graph = graph
+        n = len(graph.person_ids)
+        k = min(k, n)
+        self.people = sorted(range(n), key=lambda p: -graph.connections(p))[:k]
+        self.distances = [distances_from(graph, p) for p in self.people]
+
+    def disconnected(self, source, target):
+        """
+        Returns True if person indexes `source` and `target` are known
+        to be in different components.
+        """
+        for distance in self.distances:
+            if (distance[source] == UNREACHABLE) != (distance[target] == UNREACHABLE):
+                return True
+        return False
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees between two person
+        indexes. upper is None when no landmark reaches both, and both
+        are None when the two are known to be disconnected.
+        """
+        if source == target:
+            return 0, 0
+        if self.disconnected(source, target):
+            return None, None
+        lower, upper = 1, None
+        for distance in self.distances:
+            s, t = distance[source], distance[target]
+            if s == UNREACHABLE:
+                continue
+            lower = max(lower, abs(s - t))
+            if upper is None or s + t < upper:
+                upper = s + t
+        return lower, upper
+
+
+def distances_from(graph, source):
+    """
+    Returns an array of BFS distances from person index `source` to
+    every person index, UNREACHABLE where there is no path.
+    """
+    distance = array("h", [UNREACHABLE]) * len(graph.person_ids)
+    distance[source] = 0
+    layer = [source]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for _, neighbor in graph.neighbors(person):
+                if distance[neighbor] == UNREACHABLE:
+                    distance[neighbor] = depth
+                    next_layer.append(neighbor)
+        layer = next_layer
+    return distance
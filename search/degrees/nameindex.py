@@ -0,0 +1,138 @@
+"""
+Sorted name index for degrees, with exact, prefix and fuzzy lookups.
+
+Names are kept as one sorted sequence of lowercase keys (repeated for
+people who share a name) and a parallel sequence of the person each
+key belongs to. Walked in order, the sorted keys behave like a trie:
+consecutive keys share their common prefix, so a fuzzy search keeps
+the edit-distance rows of that prefix and recomputes only the rest,
+and skips with one binary search every key below a prefix that is
+already too far from the query.
+"""
+
+import bisect
+
+# Sorts after any character a name can contain
+LAST_CHARACTER = "\U0010ffff"
+
+
+class NameIndex():
+    def __init__(self, keys, people):
+        """
+        `keys` is a sorted sequence of lowercase names and people[i]
+        the person that keys[i] names.
+        """
+        self.keys = keys
+        self.people = people
+
+    @classmethod
+    def from_dict(cls, names):
+        """
+        Builds an index from a dict of lowercase name -> person or
+        tuple/set of people, like Graph.names or degrees.names.
+        """
+        pairs = []
+        for key, found in names.items():
+            if isinstance(found, (tuple, set, frozenset, list)):
+                pairs.extend((key, person) for person in sorted(found))
+            else:
+                pairs.append((key, found))
+        pairs.sort()
+        return cls([key for key, _ in pairs], [person for _, person in pairs])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def span(self, key):
+        """Returns the range of positions whose key equals `key`."""
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_right(self.keys, key, lo)
+        return lo, hi
+
+    def lookup(self, name):
+        """Returns the list of people with exactly this (any case) name."""
+        lo, hi = self.span(name.lower())
+        return [self.people[i] for i in range(lo, hi)]
+
+    def get(self, key, default=None):
+        """
+        Returns the person with lowercase name `key`, a tuple of them
+        if several share it, or default, like Graph.names.get.
+        """
+        lo, hi = self.span(key)
+        if lo == hi:
+            return default
+        if hi - lo == 1:
+            return self.people[lo]
+        return tuple(self.people[i] for i in range(lo, hi))
+
+    def prefix(self, prefix, limit=None):
+        """
+        Returns people whose name starts with `prefix`, in name order.
+        """
+        prefix = prefix.lower()
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + LAST_CHARACTER, lo)
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return [self.people[i] for i in range(lo, hi)]
+
+    def fuzzy(self, name, max_distance=2):
+        """
+        Returns (distance, person) pairs for every person whose name is
+        within `max_distance` edits (Levenshtein) of `name`, closest
+        first and then in name order.
+        """
+        query = name.lower()
+        keys = self.keys
+        found = []
+
+        # rows[d] is the edit-distance row of query against previous[:d]
+        rows = [list(range(len(query) + 1))]
+        previous = ""
+        i = 0
+        while i < len(keys):
+            key = keys[i]
+            common = shared_prefix(previous, key, len(rows) - 1)
+            del rows[common + 1:]
+
+            pruned = False
+            for depth in range(common, len(key)):
+                rows.append(next_row(rows[-1], key[depth], query))
+                if min(rows[-1]) > max_distance:
+                    pruned = True
+                    break
+
+            if pruned:
+                # No key starting with this prefix can come close enough
+                previous = key[:len(rows) - 1]
+                i = bisect.bisect_left(keys, previous + LAST_CHARACTER, i + 1)
+                continue
+
+            if rows[-1][-1] <= max_distance:
+                found.append((rows[-1][-1], i))
+            previous = key
+            i += 1
+
+        found.sort()
+        return [(distance, self.people[i]) for distance, i in found]
+
+
+def next_row(row, character, query):
+    """
+    Extends an edit-distance row of `query` by one more key character.
+    """
+    result = [row[0] + 1]
+    for j, q in enumerate(query, 1):
+        result.append(min(result[j - 1] + 1,
+                          row[j] + 1,
+                          row[j - 1] + (q != character)))
+    return result
+
+
+def shared_prefix(a, b, limit):
+    n = min(len(a), len(b), limit)
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
@@ -0,0 +1,156 @@
+"""
+Enumerating many paths between two people.
+
+Every function takes `neighbors`, a callable returning the
+(movie, person) pairs of a person, so it runs the same over the dicts
+in degrees.py (neighbors_for_person) and over graph.Graph indexes
+(Graph.neighbors). Paths are lists of (movie, person) pairs, as
+returned by shortest_path, and are yielded lazily.
+"""
+
+import heapq
+import itertools
+
+
+def predecessors(neighbors, source, target):
+    """
+    Breadth-first search from source, stopping once target's layer is
+    complete. Returns a dict mapping each person on some shortest path
+    to the target (except the source) to a list of the (movie, person)
+    steps leading to it from the previous layer, or None if the target
+    cannot be reached.
+    """
+    depth = {source: 0}
+    parents = {source: []}
+    layer = [source]
+    while layer and target not in depth:
+        next_layer = []
+        for person in layer:
+            for movie, neighbor in neighbors(person):
+                d = depth.get(neighbor)
+                if d is None:
+                    depth[neighbor] = depth[person] + 1
+                    parents[neighbor] = [(movie, person)]
+                    next_layer.append(neighbor)
+                elif d == depth[person] + 1:
+                    parents[neighbor].append((movie, person))
+        layer = next_layer
+    if target not in depth:
+        return None
+    return parents
+
+
+def all_shortest_paths(neighbors, source, target):
+    """
+    Yields every shortest path from source to target, walking the
+    predecessor DAG backwards from the target with an explicit stack,
+    so each path is only built once, when it is yielded.
+    """
+    if source == target:
+        yield []
+        return
+    parents = predecessors(neighbors, source, target)
+    if parents is None:
+        return
+
+    # The stack holds iterators over the predecessors of each person on
+    # the current partial path, which runs from `suffix[-1]` to target
+    suffix = []
+    stack = [iter(parents[target])]
+    people = [target]
+    while stack:
+        step = next(stack[-1], None)
+        if step is None:
+            stack.pop()
+            people.pop()
+            if suffix:
+                suffix.pop()
+            continue
+        movie, previous = step
+        suffix.append((movie, people[-1]))
+        if previous == source:
+            yield suffix[::-1]
+            suffix.pop()
+            continue
+        people.append(previous)
+        stack.append(iter(parents[previous]))
+
+
+def k_shortest_paths(neighbors, source, target, k=None):
+    """
+    Yields up to k loopless paths (all of them if k is None) from
+    source to target in order of length: first every shortest path
+    from the predecessor DAG, then longer paths by Yen's algorithm.
+    """
+    accepted = []
+    for path in all_shortest_paths(neighbors, source, target):
+        if k is not None and len(accepted) >= k:
+            return
+        accepted.append(path)
+        yield path
+    if not accepted:
+        return
+
+    seen = {tuple(path) for path in accepted}
+    candidates = []
+    counter = itertools.count()
+    for path in accepted:
+        push_spurs(neighbors, source, target, path, accepted, seen, candidates, counter)
+
+    while candidates and (k is None or len(accepted) < k):
+        _, _, path = heapq.heappop(candidates)
+        accepted.append(path)
+        yield path
+        push_spurs(neighbors, source, target, path, accepted, seen, candidates, counter)
+
+
+def push_spurs(neighbors, source, target, path, accepted, seen, candidates, counter):
+    """
+    Pushes onto `candidates` each shortest deviation from `path` that
+    keeps a prefix of it, leaves by a step no accepted path with that
+    prefix takes, and never revisits a person of the prefix.
+    """
+    people = [source] + [person for _, person in path]
+    for i in range(len(path)):
+        root = path[:i]
+        banned_steps = {other[i] for other in accepted
+                        if len(other) > i and other[:i] == root}
+        spur = restricted_path(neighbors, people[i], target,
+                               set(people[:i]), banned_steps)
+        if spur is None:
+            continue
+        candidate = root + spur
+        key = tuple(candidate)
+        if key not in seen:
+            seen.add(key)
+            heapq.heappush(candidates, (len(candidate), next(counter), candidate))
+
+
+def restricted_path(neighbors, source, target, banned_people, banned_steps):
+    """
+    Breadth-first search for a shortest path that avoids banned_people
+    and does not leave source by any of banned_steps.
+    """
+    parents = {source: None}
+    layer = [source]
+    while layer:
+        next_layer = []
+        for person in layer:
+            for step in neighbors(person):
+                movie, neighbor = step
+                if neighbor in parents or neighbor in banned_people:
+                    continue
+                if person == source and step in banned_steps:
+                    continue
+                parents[neighbor] = (movie, person)
+                if neighbor == target:
+                    path = []
+                    while parents[neighbor] is not None:
+                        movie, previous = parents[neighbor]
+                        path.append((movie, neighbor))
+                        neighbor = previous
+                    path.reverse()
+                    return path
+                next_layer.append(neighbor)
+        layer = next_layer
+    return None
@@ -0,0 +1,278 @@
+"""
+Binary snapshot of a parsed degrees dataset.
+
+Usage: python snapshot.py directory [snapshot]
+
+Compiles people.csv, movies.csv and stars.csv into a single file that
+`load` memory-maps on later runs instead of re-parsing the CSVs. The
+CSR arrays of `graph.Graph` are used straight out of the mapping; the
+string columns and the id/name indexes are read lazily on lookup.
+Names are stored sorted, as the keys of a nameindex.NameIndex.
+
+A snapshot is rebuilt when its format version differs, or when the
+size or mtime of any CSV differs from when it was compiled (and, with
+`verify`, when their SHA-256 differs).
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import Graph, print_progress
+from nameindex import NameIndex
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 2
+
+# magic, version, length of the JSON header that follows
+PREFIX = struct.Struct("<8sII")
+
+FILES = ("people.csv", "movies.csv", "stars.csv")
+
+
+def default_path(directory):
+    return os.path.join(directory, "degrees.snapshot")
+
+
+def fingerprint(directory, digest=False):
+    """
+    Returns size and mtime (and optionally SHA-256) of each CSV file.
+    """
+    result = {}
+    for filename in FILES:
+        path = os.path.join(directory, filename)
+        stat = os.stat(path)
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if digest:
+            sha = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(block)
+            entry["sha256"] = sha.hexdigest()
+        result[filename] = entry
+    return result
+
+
+def load(directory, path=None, verify=False, progress=None):
+    """
+    Returns a Graph for `directory`, memory-mapped from the snapshot at
+    `path` if it is current, otherwise parsed from the CSVs (reporting
+    to `progress`) and written to `path` for next time.
+    """
+    path = path or default_path(directory)
+    graph = read(path, directory, verify)
+    if graph is None:
+        graph = Graph.load(directory, progress)
+        write(graph, path, directory)
+    return graph
+
+
+def write(graph, path, directory):
+    """
+    Writes `graph` to `path`, recording the fingerprint of `directory`.
+    The file is written next to `path` and renamed into place.
+    """
+    person_ids = encode_strings(graph.person_ids)
+    movie_ids = encode_strings(graph.movie_ids)
+    name_keys = [name.lower() for name in graph.person_names]
+    id_order = sorted(range(len(graph.person_ids)), key=graph.person_ids.__getitem__)
+    movie_order = sorted(range(len(graph.movie_ids)), key=graph.movie_ids.__getitem__)
+    name_order = sorted(range(len(name_keys)), key=name_keys.__getitem__)
+
+    sections = {
+        "person_start": array_bytes(graph.person_start),
+        "movie_of": array_bytes(graph.movie_of),
+        "movie_start": array_bytes(graph.movie_start),
+        "star_of": array_bytes(graph.star_of),
+        "component": array_bytes(graph.component),
+        "person_ids": person_ids,
+        "person_names": encode_strings(graph.person_names),
+        "person_births": encode_strings(graph.person_births),
+        "movie_ids": movie_ids,
+        "movie_titles": encode_strings(graph.movie_titles),
+        "movie_years": encode_strings(graph.movie_years),
+        "id_order": array_bytes(array("l", id_order)),
+        "movie_order": array_bytes(array("l", movie_order)),
+        "name_order": array_bytes(array("l", name_order)),
+        "name_keys": encode_strings([name_keys[i] for i in name_order]),
+    }
+
+    # Lay sections out 8-byte aligned after the header
+    header = {
+        "itemsize": array("l").itemsize,
+        "people": len(graph.person_ids),
+        "movies": len(graph.movie_ids),
+        "sources": fingerprint(directory, digest=True),
+        "sections": {},
+    }
+    offset = 0
+    for name, data in sections.items():
+        header["sections"][name] = [offset, len(data)]
+        offset += align(len(data))
+    header_bytes = json.dumps(header).encode("utf-8")
+    base = align(PREFIX.size + len(header_bytes))
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(PREFIX.pack(MAGIC, VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(bytes(base - PREFIX.size - len(header_bytes)))
+        for data in sections.values():
+            f.write(data)
+            f.write(bytes(align(len(data)) - len(data)))
+    os.replace(tmp, path)
+
+
+def read(path, directory, verify=False):
+    """
+    Maps the snapshot at `path` as a Graph, or returns None if it is
+    missing, from another format version, or stale for `directory`.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        prefix = f.read(PREFIX.size)
+        if len(prefix) < PREFIX.size:
+            return None
+        magic, version, header_size = PREFIX.unpack(prefix)
+        if magic != MAGIC or version != VERSION:
+            return None
+        header = json.loads(f.read(header_size))
+        if header["itemsize"] != array("l").itemsize:
+            return None
+        if not fresh(header["sources"], directory, verify):
+            return None
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapped)
+    base = align(PREFIX.size + header_size)
+
+    def section(name):
+        offset, size = header["sections"][name]
+        return view[base + offset:base + offset + size]
+
+    def ints(name):
+        return section(name).cast("l")
+
+    def strings(name):
+        return StringTable(section(name))
+
+    graph = Graph()
+    graph.person_start = ints("person_start")
+    graph.movie_of = ints("movie_of")
+    graph.movie_start = ints("movie_start")
+    graph.star_of = ints("star_of")
+    graph.component = ints("component")
+    graph.person_ids = strings("person_ids")
+    graph.person_names = strings("person_names")
+    graph.person_births = strings("person_births")
+    graph.movie_ids = strings("movie_ids")
+    graph.movie_titles = strings("movie_titles")
+    graph.movie_years = strings("movie_years")
+    graph.person_index = SortedIndex(graph.person_ids, ints("id_order"))
+    graph.movie_index = SortedIndex(graph.movie_ids, ints("movie_order"))
+    graph.names = graph.name_index = NameIndex(strings("name_keys"), ints("name_order"))
+    return graph
+
+
+def fresh(sources, directory, verify):
+    try:
+        current = fingerprint(directory, digest=verify)
+    except FileNotFoundError:
+        return False
+    for filename, entry in current.items():
+        recorded = sources.get(filename, {})
+        for key, value in entry.items():
+            if recorded.get(key) != value:
+                return False
+    return True
+
+
+class StringTable():
+    """
+    Read-only sequence of strings stored as a count, an array of
+    n + 1 byte offsets and a UTF-8 blob.
+    """
+    def __init__(self, data):
+        count = data[:8].cast("q")[0]
+        self.offsets = data[8:8 * (count + 2)].cast("q")
+        self.blob = data[8 * (count + 2):]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class SortedIndex():
+    """
+    Read-only mapping from a unique string to its index in `table`,
+    using `order`, the table's indexes sorted by string, and binary
+    search.
+    """
+    def __init__(self, table, order):
+        self.table = table
+        self.order = order
+
+    def key(self, position):
+        return self.table[self.order[position]]
+
+    def get(self, key, default=None):
+        lo = bisect.bisect_left(range(len(self.order)), key, key=self.key)
+        if lo < len(self.order) and self.key(lo) == key:
+            return self.order[lo]
+        return default
+
+    def __getitem__(self, key):
+        found = self.get(key)
+        if found is None:
+            raise KeyError(key)
+        return found
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self.order)
+
+
+def encode_strings(strings):
+    blobs = [s.encode("utf-8") for s in strings]
+    offsets = array("q", [len(blobs)])
+    position = 0
+    offsets.append(position)
+    for blob in blobs:
+        position += len(blob)
+        offsets.append(position)
+    return offsets.tobytes() + b"".join(blobs)
+
+
+def array_bytes(values):
+    return array("l", values).tobytes()
+
+
+def align(size):
+    return (size + 7) & ~7
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python snapshot.py directory [snapshot]")
+    directory = sys.argv[1]
+    path = sys.argv[2] if len(sys.argv) == 3 else default_path(directory)
+    write(Graph.load(directory, print_progress), path, directory)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Per-query search statistics for degrees.
+
+A SearchStats is passed to a search to be filled in; it records how
+much work the search did and where the time went, and serialises to
+one JSON object per query for latency histograms.
+"""
+
+import json
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PHASES = ("load", "index", "search")
+
+
+class SearchStats():
+    def __init__(self, source=None, target=None):
+        self.source = source
+        self.target = target
+        self.nodes_expanded = 0
+        self.neighbors_generated = 0
+        self.peak_frontier = 0
+        self.peak_memory = None
+        self.degrees = None
+        self.timings = dict.fromkeys(PHASES, 0.0)
+
+    def expand(self, neighbors):
+        """Counts one expanded person and the neighbors it generated."""
+        self.nodes_expanded += 1
+        self.neighbors_generated += neighbors
+
+    def frontier(self, size):
+        """Records the current number of people waiting to be expanded."""
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    def timed(self, phase):
+        """Context manager adding the time spent inside it to `phase`."""
+        return Timer(self, phase)
+
+    def finish(self, path):
+        """Records the result and the process's peak memory so far."""
+        self.degrees = None if path is None else len(path)
+        self.peak_memory = peak_memory()
+
+    def as_dict(self):
+        return {
+            "source": self.source,
+            "target": self.target,
+            "degrees": self.degrees,
+            "nodes_expanded": self.nodes_expanded,
+            "neighbors_generated": self.neighbors_generated,
+            "peak_frontier": self.peak_frontier,
+            "peak_memory": self.peak_memory,
+            "timings": self.timings,
+        }
+
+    def __repr__(self):
+        return f"SearchStats({self.as_dict()})"
+
+
+class Timer():
+    def __init__(self, stats, phase):
+        self.stats = stats
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.stats
+
+    def __exit__(self, *exc):
+        self.stats.timings[self.phase] += time.perf_counter() - self.start
+        return False
+
+
+def peak_memory():
+    """
+    Returns the peak memory in bytes: traced Python allocations if
+    tracemalloc is running, else the process's peak resident set size,
+    else None.
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return None
+
+
+def json_lines(f):
+    """
+    Returns a hook for degrees.stats_hook that writes each query's
+    stats to the open file `f` as a line of JSON.
+    """
+    def hook(stats):
+        f.write(json.dumps(stats.as_dict()) + "\n")
+        f.flush()
+    return hook
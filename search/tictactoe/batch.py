@@ -0,0 +1,76 @@
+"""
+Batch position evaluation for Tic Tac Toe
+
+evaluate_batch answers many boards at once across a pool of worker
+processes, and evaluate_async does the same from asyncio through
+run_in_executor, so a server can keep its event loop free while the
+pool works. Boards may be lists of lists or bitboards; they are sent
+to the workers as bitboards, in chunks, to keep pickling cheap.
+"""
+
+import asyncio
+import concurrent.futures
+
+import bitboard
+import solved
+
+# Boards sent to a worker at a time
+CHUNK_SIZE = 256
+
+
+def evaluate(board):
+    """
+    Returns (action, value) for a bitboard: the best action (i, j), or
+    None if the game is over, and the minimax value (1 if X wins, -1 if
+    O wins, 0 for a tie). Read from the solved table if it is built.
+    """
+    table = solved.get_table()
+    if table is not None:
+        value, action = solved.lookup(board, table)
+        return action, value
+    return bitboard.best(board)
+
+
+def evaluate_many(boards):
+    return [evaluate(board) for board in boards]
+
+
+def chunks(boards, size):
+    boards = [board if isinstance(board, tuple) else bitboard.to_bitboard(board)
+              for board in boards]
+    return [boards[i:i + size] for i in range(0, len(boards), size)]
+
+
+def executor(workers=None):
+    """
+    Returns a process pool whose workers have the solved table loaded.
+    """
+    return concurrent.futures.ProcessPoolExecutor(workers, initializer=solved.get_table)
+
+
+def evaluate_batch(boards, pool=None, chunk_size=CHUNK_SIZE):
+    """
+    Returns a list of (action, value), one per board, computed on
+    `pool` (a fresh executor() if None).
+    """
+    if pool is None:
+        with executor() as pool:
+            return evaluate_batch(boards, pool, chunk_size)
+    results = []
+    for chunk in pool.map(evaluate_many, chunks(boards, chunk_size)):
+        results.extend(chunk)
+    return results
+
+
+async def evaluate_async(boards, pool, chunk_size=CHUNK_SIZE):
+    """
+    Awaitable evaluate_batch: each chunk runs on `pool` through the
+    running loop's run_in_executor, and the loop is free meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    futures = [loop.run_in_executor(pool, evaluate_many, chunk)
+               for chunk in chunks(boards, chunk_size)]
+    results = []
+    for chunk in await asyncio.gather(*futures):
+        results.extend(chunk)
+    return results
@@ -0,0 +1,257 @@
+"""
+Benchmarks for the tic-tac-toe search.
+
+Usage: python benchmark.py
+       python benchmark.py --mnk ROWS COLS K [--budgets SECONDS ...]
+       python benchmark.py --mnk ROWS COLS K --depth D [--workers N ...] [--seed S]
+       python benchmark.py --batch BOARDS [--workers N ...]
+       python benchmark.py --make
+
+Times the first move from an empty board, and a few later positions,
+for the plain dfs search and the alpha-beta bitboard search with a
+cold transposition table, counting positions generated by
+tictactoe.result and bitboard.play; then for a lookup in the solved
+position table, built first if it is not on disk.
+
+With --mnk, the mnk.py engine is run from an empty ROWS x COLS board
+with K in a row to win, reporting nodes/s and the depth it completes
+within each time budget (0.1, 1 and 10 seconds by default). With
+--depth, it is searched to depth D instead, by Engine.search and by
+Engine.parallel_search with each number of workers, reporting the
+speedup over the single-process search.
+
+With --batch, BOARDS random positions are evaluated through batch.py
+with each number of workers, directly and through asyncio, with and
+without the solved table, reporting boards/s.
+
+With --make, the copy-based dfs search (tictactoe.result copies the
+board at every node) is compared with the same search over a
+position.Position changed in place by make/unmake, in nodes/s and in
+peak memory traced by tracemalloc.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+import tracemalloc
+
+import batch
+import bitboard
+import mnk
+import position
+import solved
+import tictactoe as ttt
+
+X, O, EMPTY = ttt.X, ttt.O, ttt.EMPTY
+
+POSITIONS = [
+    ("empty", ttt.initial_state()),
+    ("corner", [[X, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]]),
+    ("center", [[EMPTY, EMPTY, EMPTY], [EMPTY, X, EMPTY], [EMPTY, EMPTY, O]]),
+    ("midgame", [[X, O, EMPTY], [EMPTY, X, EMPTY], [O, EMPTY, EMPTY]]),
+]
+
+
+def count_positions():
+    """
+    Wraps ttt.result and bitboard.play so every generated position is
+    counted. Returns the counter; reset it with counter[0] = 0.
+    """
+    counter = [0]
+
+    def counting(function):
+        def counted(board, move):
+            counter[0] += 1
+            return function(board, move)
+        return counted
+
+    ttt.result = counting(ttt.result)
+    bitboard.play = counting(bitboard.play)
+    return counter
+
+
+def run(label, search, board, counter):
+    counter[0] = 0
+    ttt.transposition_table.clear()
+    start = time.perf_counter()
+    action = search(board)
+    elapsed = time.perf_counter() - start
+    line = f"  {label:10} move {str(action):7} {counter[0]:8} positions  {elapsed * 1000:9.2f} ms"
+    if counter[0]:
+        line += f"  {counter[0] / elapsed:12,.0f} positions/s"
+    if search is alphabeta:
+        line += f"  table hit rate {ttt.transposition_table.hit_rate():.1%}"
+    print(line)
+
+
+def alphabeta(board):
+    return bitboard.minimax(bitboard.to_bitboard(board))
+
+
+def lookup(board):
+    return solved.lookup(bitboard.to_bitboard(board))[1]
+
+
+def benchmark_lookups(repeat=100000):
+    boards = [bitboard.to_bitboard(board) for _, board in POSITIONS]
+    start = time.perf_counter()
+    for _ in range(repeat // len(boards)):
+        for board in boards:
+            solved.lookup(board)
+    elapsed = time.perf_counter() - start
+    print(f"table lookups: {elapsed / repeat * 1e6:.2f} us each, "
+          f"{repeat / elapsed:,.0f} boards/s")
+
+
+def benchmark_mnk(rows, cols, k, budgets):
+    print(f"{rows}x{cols}, {k} in a row")
+    for budget in budgets:
+        result = mnk.Engine().search(mnk.Board(rows, cols, k), budget)
+        print(f"  budget {budget:6.1f}s  depth {result.depth:3}  move {str(result.move):8} "
+              f"value {result.value:8}  {result.nodes:10} nodes  "
+              f"{result.nodes / result.elapsed:10,.0f} nodes/s")
+
+
+def benchmark_parallel(rows, cols, k, depth, workers, seed):
+    print(f"{rows}x{cols}, {k} in a row, depth {depth}")
+    start = time.perf_counter()
+    result = mnk.Engine().search(mnk.Board(rows, cols, k), None, depth)
+    single = time.perf_counter() - start
+    print(f"  {1:3} process   move {str(result.move):8} value {result.value:8}  "
+          f"{result.nodes:10} nodes  {single:8.2f} s")
+    for count in workers:
+        start = time.perf_counter()
+        result = mnk.Engine().parallel_search(mnk.Board(rows, cols, k), count, None, depth, seed)
+        elapsed = time.perf_counter() - start
+        print(f"  {count:3} workers   move {str(result.move):8} value {result.value:8}  "
+              f"{result.nodes:10} nodes  {elapsed:8.2f} s  speedup {single / elapsed:5.2f}x")
+
+
+def random_boards(n, seed=0):
+    """
+    Returns n positions reached by random play from the empty board,
+    none of them finished.
+    """
+    rng = random.Random(seed)
+    boards = []
+    while len(boards) < n:
+        board = bitboard.initial_state()
+        for _ in range(rng.randrange(9)):
+            if bitboard.terminal(board):
+                break
+            board = bitboard.play(board, rng.choice(bitboard.moves(board)))
+        if not bitboard.terminal(board):
+            boards.append(board)
+    return boards
+
+
+def benchmark_batch(n, workers):
+    boards = random_boards(n)
+    for table in (False, True):
+        if table and solved.get_table() is None:
+            solved.write()
+        solved.table = None if table else False
+        label = "table" if table else "search"
+        for count in workers:
+            with batch.executor(count) as pool:
+                # Start every worker before timing
+                batch.evaluate_batch(boards[:count * batch.CHUNK_SIZE], pool)
+
+                start = time.perf_counter()
+                batch.evaluate_batch(boards, pool)
+                direct = time.perf_counter() - start
+
+                start = time.perf_counter()
+                asyncio.run(batch.evaluate_async(boards, pool))
+                awaited = time.perf_counter() - start
+            print(f"{label:6} {count:3} workers  {n / direct:12,.0f} boards/s  "
+                  f"{n / awaited:12,.0f} boards/s via asyncio")
+
+
+def profile(search, board):
+    """
+    Returns (seconds, peak bytes allocated) for search(board).
+    """
+    start = time.perf_counter()
+    search(board)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    search(board)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def benchmark_make():
+    nodes = [0]
+    copying, make = ttt.result, position.Position.make
+
+    def counted_result(board, action):
+        nodes[0] += 1
+        return copying(board, action)
+
+    def counted_make(self, cell):
+        nodes[0] += 1
+        make(self, cell)
+
+    for name, board in POSITIONS:
+        print(name)
+        for label, search, module, counted, function in (
+            ("copy", ttt.dfs_minimax, ttt, counted_result, "result"),
+            ("make", position.minimax, position.Position, counted_make, "make"),
+        ):
+            nodes[0] = 0
+            setattr(module, function, counted)
+            search(board)
+            setattr(module, function, copying if module is ttt else make)
+            elapsed, peak = profile(search, board)
+            print(f"  {label:5} {nodes[0]:8} nodes  {elapsed * 1000:9.2f} ms  "
+                  f"{nodes[0] / elapsed:12,.0f} nodes/s  peak {peak / 1024:8.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mnk", type=int, nargs=3, metavar=("ROWS", "COLS", "K"))
+    parser.add_argument("--budgets", type=float, nargs="+", default=[0.1, 1, 10])
+    parser.add_argument("--batch", type=int, metavar="BOARDS")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, os.cpu_count() or 1}))
+    parser.add_argument("--make", action="store_true")
+    parser.add_argument("--depth", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.make:
+        benchmark_make()
+        return
+
+    if args.batch:
+        benchmark_batch(args.batch, args.workers)
+        return
+
+    if args.mnk and args.depth:
+        benchmark_parallel(*args.mnk, args.depth, args.workers, args.seed)
+        return
+
+    if args.mnk:
+        benchmark_mnk(*args.mnk, args.budgets)
+        return
+
+    if solved.get_table() is None:
+        solved.write()
+        solved.table = None
+
+    counter = count_positions()
+    for name, board in POSITIONS:
+        print(name)
+        run("dfs", ttt.dfs_minimax, board, counter)
+        run("alphabeta", alphabeta, board, counter)
+        run("table", lookup, board, counter)
+    benchmark_lookups()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Bitboard Tic Tac Toe
+
+A board is a pair of 9-bit ints (x, o): bit 3 * i + j is set in x if X
+has played cell (i, j), and likewise in o. The functions mirror those
+of tictactoe.py; to_bitboard and from_bitboard convert between the two
+representations.
+"""
+
+import math
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# The 8 lines of three cells, as masks
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,               # diagonals
+)
+
+# Cells (i, j) by bit, and bits by cell
+CELLS = tuple((bit // 3, bit % 3) for bit in range(9))
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def to_bitboard(board):
+    """
+    Converts a list-of-lists board to a bitboard.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (3 * i + j)
+            elif cell == O:
+                o |= 1 << (3 * i + j)
+    return (x, o)
+
+
+def from_bitboard(board):
+    """
+    Converts a bitboard to a list-of-lists board.
+    """
+    x, o = board
+    return [
+        [X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else EMPTY
+         for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = board
+    return O if x.bit_count() > o.bit_count() else X
+
+
+def moves(board):
+    """
+    Returns the free cells of a board as bit indexes, in order.
+    """
+    free = FULL & ~(board[0] | board[1])
+    return [bit for bit in range(9) if free >> bit & 1]
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return {CELLS[bit] for bit in moves(board)}
+
+
+def play(board, bit):
+    """
+    Returns the board after the current player takes cell `bit`,
+    without any checks.
+    """
+    x, o = board
+    if x.bit_count() > o.bit_count():
+        return (x, o | 1 << bit)
+    return (x | 1 << bit, o)
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3):
+        raise RuntimeError("action is not vaild")
+    bit = 3 * i + j
+    if (board[0] | board[1]) >> bit & 1:
+        raise RuntimeError("action is not vaild")
+    return play(board, bit)
+
+
+def wins(mask):
+    """
+    Returns True if the cells in `mask` contain a full line.
+    """
+    for line in WIN_MASKS:
+        if mask & line == line:
+            return True
+    return False
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if wins(board[0]):
+        return X
+    if wins(board[1]):
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return (board[0] | board[1]) == FULL or wins(board[0]) or wins(board[1])
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if wins(board[0]):
+        return 1
+    if wins(board[1]):
+        return -1
+    return 0
+
+
+# Kinds of value kept in the transposition table: the exact minimax
+# value, or only a lower or upper bound on it after an alpha-beta cutoff
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable(dict):
+    """
+    Maps canonical board keys to (value, flag) pairs, counting how many
+    probes found an entry.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key):
+        entry = self.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def hit_rate(self):
+        probes = self.hits + self.misses
+        return self.hits / probes if probes else 0.0
+
+    def clear(self):
+        super().clear()
+        self.hits = 0
+        self.misses = 0
+
+
+transposition_table = TranspositionTable()
+
+
+def symmetries(width):
+    """
+    Returns the 8 rotations and reflections of a width x width board,
+    each as a list mapping cell i of the transformed board (row-major)
+    to the cell of the original board it comes from.
+    """
+    cells = [[(i, j) for j in range(width)] for i in range(width)]
+    result = []
+    for _ in range(4):
+        cells = [list(row) for row in zip(*cells[::-1])]  # rotate 90 degrees
+        for grid in (cells, [row[::-1] for row in cells]):
+            result.append([i * width + j for row in grid for i, j in row])
+    return result
+
+
+SYMMETRIES = symmetries(3)
+
+# For each symmetry, every 9-bit mask transformed by it
+SYMMETRY_TABLES = tuple(
+    tuple(
+        sum(1 << cell for cell, source in enumerate(symmetry) if mask >> source & 1)
+        for mask in range(1 << 9)
+    )
+    for symmetry in SYMMETRIES
+)
+
+
+def canonical(board):
+    """
+    Returns an int key shared by a board and all its rotations and
+    reflections, which all have the same minimax value.
+    """
+    x, o = board
+    return min(table[x] << 9 | table[o] for table in SYMMETRY_TABLES)
+
+
+def alphabeta(board, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the minimax value of the board (1 if X wins, -1 if O wins,
+    0 for a tie), searching with alpha-beta pruning and caching values
+    of positions, up to symmetry, in transposition_table.
+    """
+    if terminal(board):
+        return utility(board)
+
+    key = canonical(board)
+    entry = transposition_table.probe(key)
+    if entry is not None:
+        value, flag = entry
+        if flag == EXACT:
+            return value
+        elif flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    original_alpha, original_beta = alpha, beta
+    if player(board) == X:
+        value = -math.inf
+        for bit in moves(board):
+            value = max(value, alphabeta(play(board, bit), alpha, beta))
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+    else:
+        value = math.inf
+        for bit in moves(board):
+            value = min(value, alphabeta(play(board, bit), alpha, beta))
+            beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+    if value <= original_alpha:
+        flag = UPPER
+    elif value >= original_beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    transposition_table[key] = (value, flag)
+    return value
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    return best(board)[0]
+
+
+def best(board):
+    """
+    Returns (action, value) for the current player on the board: the
+    optimal action, or None if the game is over, and the board's
+    minimax value, from one search.
+    """
+    if terminal(board):
+        return None, utility(board)
+
+    # X maximizes, O minimizes; a child only becomes the best action if
+    # it beats the best value so far, so that value bounds its search
+    maximizing = player(board) == X
+    best_value = -math.inf if maximizing else math.inf
+    best_action = None
+    for bit in moves(board):
+        if maximizing:
+            value = alphabeta(play(board, bit), best_value, math.inf)
+            if value > best_value:
+                best_value, best_action = value, CELLS[bit]
+        else:
+            value = alphabeta(play(board, bit), -math.inf, best_value)
+            if value < best_value:
+                best_value, best_action = value, CELLS[bit]
+    return best_action, best_value
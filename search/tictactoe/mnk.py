@@ -0,0 +1,419 @@
+"""
+Generalized m,n,k-game engine
+
+Tic Tac Toe on a rows x cols board where k in a row wins. Full minimax
+is hopeless beyond 3x3, so Engine runs an iterative-deepening negamax
+with alpha-beta pruning inside a time budget: a transposition table
+keyed on a Zobrist hash, moves ordered by the table's best move, then
+killer moves, then the history heuristic, and a pluggable evaluation
+function for positions at the depth limit.
+
+Engine.parallel_search splits the root moves across worker processes,
+each searching its share with a copy of the table, and merges the
+workers' tables back afterwards.
+"""
+
+import collections
+import concurrent.futures
+import random
+import time
+
+X = 1
+O = -1
+EMPTY = 0
+
+# Score of a won game; wins found sooner score higher
+WIN = 1000000
+
+# The four directions a line of k can run in
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+class Board():
+    """
+    A position, changed in place by make and restored by unmake.
+    Cells are indexed row-major and hold X, O or EMPTY.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+        self.cells = [EMPTY] * self.size
+        self.side = X
+        self.filled = 0
+        self.winner = EMPTY
+        self.hash = 0
+        self.moves_made = []
+        self.keys = zobrist_keys(self.size)
+
+    @classmethod
+    def from_lists(cls, board, k=3):
+        """
+        Builds a Board from a list-of-lists board of "X", "O" and None,
+        as used by tictactoe.py.
+        """
+        result = cls(len(board), len(board[0]), k)
+        stones = {"X": X, "O": O}
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell in stones:
+                    result.place(i * result.cols + j, stones[cell])
+        result.side = X if result.cells.count(X) <= result.cells.count(O) else O
+        for cell in range(result.size):
+            if result.cells[cell] != EMPTY and result.wins_at(cell):
+                result.winner = result.cells[cell]
+        return result
+
+    def to_lists(self):
+        names = {X: "X", O: "O", EMPTY: None}
+        return [[names[self.cells[i * self.cols + j]] for j in range(self.cols)]
+                for i in range(self.rows)]
+
+    def action(self, cell):
+        """Returns the (i, j) action of a cell index."""
+        return divmod(cell, self.cols)
+
+    def place(self, cell, side):
+        self.cells[cell] = side
+        self.hash ^= self.keys[cell][side == O]
+        self.filled += 1
+
+    def make(self, cell):
+        """Plays `cell` for the side to move."""
+        self.place(cell, self.side)
+        self.moves_made.append(cell)
+        if self.wins_at(cell):
+            self.winner = self.side
+        self.side = -self.side
+
+    def unmake(self):
+        """Takes back the last move made."""
+        cell = self.moves_made.pop()
+        self.side = -self.side
+        self.cells[cell] = EMPTY
+        self.hash ^= self.keys[cell][self.side == O]
+        self.filled -= 1
+        self.winner = EMPTY
+
+    def legal_moves(self):
+        return [cell for cell in range(self.size) if self.cells[cell] == EMPTY]
+
+    def terminal(self):
+        return self.winner != EMPTY or self.filled == self.size
+
+    def wins_at(self, cell):
+        """Returns True if the stone on `cell` is part of k in a row."""
+        side = self.cells[cell]
+        row, col = divmod(cell, self.cols)
+        for dr, dc in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                r, c = row + sign * dr, col + sign * dc
+                while (0 <= r < self.rows and 0 <= c < self.cols
+                       and self.cells[r * self.cols + c] == side):
+                    count += 1
+                    r += sign * dr
+                    c += sign * dc
+            if count >= self.k:
+                return True
+        return False
+
+
+def zobrist_keys(size, cache={}):
+    """
+    Returns a fixed random 64-bit key for each (cell, side) of a board
+    with `size` cells, the same on every call.
+    """
+    if size not in cache:
+        rng = random.Random(size)
+        cache[size] = [(rng.getrandbits(64), rng.getrandbits(64)) for _ in range(size)]
+    return cache[size]
+
+
+def windows(rows, cols, k, cache={}):
+    """
+    Returns every line of k cells on a rows x cols board, as tuples of
+    cell indexes.
+    """
+    key = (rows, cols, k)
+    if key not in cache:
+        lines = []
+        for row in range(rows):
+            for col in range(cols):
+                for dr, dc in DIRECTIONS:
+                    end_r, end_c = row + (k - 1) * dr, col + (k - 1) * dc
+                    if 0 <= end_r < rows and 0 <= end_c < cols:
+                        lines.append(tuple((row + i * dr) * cols + col + i * dc
+                                           for i in range(k)))
+        cache[key] = lines
+    return cache[key]
+
+
+def line_evaluation(board):
+    """
+    Scores a position for X: every line of k cells that only one side
+    has stones on counts 4 ** stones for that side.
+    """
+    cells = board.cells
+    score = 0
+    for line in windows(board.rows, board.cols, board.k):
+        xs = os = 0
+        for cell in line:
+            if cells[cell] == X:
+                xs += 1
+            elif cells[cell] == O:
+                os += 1
+        if os == 0 and xs:
+            score += 4 ** xs
+        elif xs == 0 and os:
+            score -= 4 ** os
+    return score
+
+
+# Values kept in the transposition table, as in bitboard.py
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+SearchResult = collections.namedtuple(
+    "SearchResult", ["move", "value", "depth", "nodes", "elapsed"]
+)
+
+
+class Timeout(Exception):
+    pass
+
+
+class Engine():
+    def __init__(self, evaluate=line_evaluation):
+        """
+        `evaluate(board)` scores a position that is not over from X's
+        point of view; larger is better for X.
+        """
+        self.evaluate = evaluate
+        self.table = {}
+        self.killers = collections.defaultdict(list)
+        self.history = collections.defaultdict(int)
+        self.nodes = 0
+        self.deadline = None
+        self.completed = {}
+
+    def search(self, board, time_limit=1.0, max_depth=None, moves=None):
+        """
+        Searches `board` one depth deeper at a time until `time_limit`
+        seconds have passed (or max_depth is done, or the game is
+        solved), returning a SearchResult for the deepest finished
+        depth. The move is an (i, j) action. If `moves` is given, only
+        those root cells are searched.
+
+        self.completed maps each finished depth to its (value, cell).
+        """
+        start = time.perf_counter()
+        self.deadline = start + time_limit if time_limit else None
+        self.nodes = 0
+        self.killers.clear()
+        self.completed = {}
+        max_depth = max_depth or board.size - board.filled
+
+        moves = board.legal_moves() if moves is None else list(moves)
+        if board.terminal() or not moves:
+            return SearchResult(None, 0, 0, 0, 0.0)
+        result = SearchResult(board.action(moves[0]), 0, 0, 0, 0.0)
+
+        for depth in range(1, max_depth + 1):
+            depth_reached = len(board.moves_made)
+            try:
+                value, move = self.root(board, depth, moves)
+            except Timeout:
+                while len(board.moves_made) > depth_reached:
+                    board.unmake()
+                break
+            self.completed[depth] = (value, move)
+            result = SearchResult(board.action(move), value, depth, self.nodes,
+                                  time.perf_counter() - start)
+            if abs(value) >= WIN - board.size:
+                break
+        return result._replace(nodes=self.nodes, elapsed=time.perf_counter() - start)
+
+    def root(self, board, depth, moves):
+        alpha, beta = -WIN - 1, WIN + 1
+        best_move = None
+        for cell in self.ordered_moves(board, 0):
+            if cell not in moves:
+                continue
+            board.make(cell)
+            value = -self.negamax(board, depth - 1, -beta, -alpha, 1)
+            board.unmake()
+            if best_move is None or value > alpha:
+                alpha, best_move = value, cell
+        if len(moves) == board.size - board.filled:
+            self.table[board.hash] = (depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def parallel_search(self, board, workers=2, time_limit=1.0, max_depth=None, seed=None):
+        """
+        Like search, but deals the root moves out to `workers` processes
+        (shuffled by `seed` first, if given), each searching its share
+        from a copy of self.table. The result is the best move over all
+        workers at the deepest depth every worker finished, so with
+        max_depth and no time_limit it is the same on every run. The
+        workers' tables are merged into self.table, deeper entries
+        winning.
+        """
+        start = time.perf_counter()
+        moves = board.legal_moves()
+        if board.terminal() or not moves:
+            return SearchResult(None, 0, 0, 0, 0.0)
+        if seed is not None:
+            random.Random(seed).shuffle(moves)
+        shares = [moves[i::workers] for i in range(workers) if moves[i::workers]]
+
+        with concurrent.futures.ProcessPoolExecutor(len(shares)) as pool:
+            jobs = [pool.submit(search_share, self.evaluate, self.table, board,
+                                share, time_limit, max_depth)
+                    for share in shares]
+            results = [job.result() for job in jobs]
+
+        nodes = 0
+        for completed, searched, table in results:
+            nodes += searched
+            merge(self.table, table)
+
+        # A worker that stopped early on a won or lost game has the same
+        # answer at every deeper depth
+        depths = [max(completed, default=0) for completed, _, _ in results]
+        unsolved = [last for (completed, _, _), last in zip(results, depths)
+                    if not completed or abs(completed[last][0]) < WIN - board.size]
+        depth = min(unsolved) if unsolved else max(depths)
+        if depth == 0:
+            return SearchResult(board.action(moves[0]), 0, 0, nodes,
+                                time.perf_counter() - start)
+        value, cell = max((completed[min(depth, last)]
+                           for (completed, _, _), last in zip(results, depths)),
+                          key=lambda best: best[0])
+        return SearchResult(board.action(cell), value, depth, nodes,
+                            time.perf_counter() - start)
+
+    def negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and self.deadline and time.perf_counter() > self.deadline:
+            raise Timeout()
+
+        # The side that just moved may have won
+        if board.winner != EMPTY:
+            return -(WIN - ply)
+        if board.filled == board.size:
+            return 0
+        if depth == 0:
+            return board.side * self.evaluate(board)
+
+        entry = self.table.get(board.hash)
+        if entry is not None and entry[0] >= depth:
+            _, value, flag, _ = entry
+            value = from_table(value, ply)
+            if flag == EXACT:
+                return value
+            elif flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        original_alpha = alpha
+        best_value = -WIN - 1
+        best_move = None
+        for cell in self.ordered_moves(board, ply):
+            board.make(cell)
+            value = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.unmake()
+            if value > best_value:
+                best_value, best_move = value, cell
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                self.record_cutoff(cell, depth, ply)
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[board.hash] = (depth, to_table(best_value, ply), flag, best_move)
+        return best_value
+
+    def ordered_moves(self, board, ply):
+        """
+        Legal moves: the table's best move first, then this ply's
+        killer moves, then the rest by history score.
+        """
+        moves = board.legal_moves()
+        history = self.history
+        moves.sort(key=lambda cell: -history[cell])
+        first = list(self.killers[ply])
+        entry = self.table.get(board.hash)
+        if entry is not None and entry[3] is not None:
+            first.insert(0, entry[3])
+        for cell in reversed(first):
+            if board.cells[cell] == EMPTY:
+                moves.remove(cell)
+                moves.insert(0, cell)
+        return moves
+
+    def record_cutoff(self, cell, depth, ply):
+        killers = self.killers[ply]
+        if cell not in killers:
+            killers.insert(0, cell)
+            del killers[2:]
+        self.history[cell] += depth * depth
+
+
+def search_share(evaluate, table, board, moves, time_limit, max_depth):
+    """
+    Runs in a worker process: searches `moves` at the root of `board`,
+    returning (completed depths, nodes, table).
+    """
+    engine = Engine(evaluate)
+    engine.table = table
+    engine.search(board, time_limit, max_depth, moves)
+    return engine.completed, engine.nodes, engine.table
+
+
+def merge(table, other):
+    """
+    Adds the entries of `other` to `table`, keeping the deeper search
+    where both have the same position.
+    """
+    for key, entry in other.items():
+        current = table.get(key)
+        if current is None or entry[0] > current[0]:
+            table[key] = entry
+
+
+def to_table(value, ply):
+    """Stores win scores relative to the position instead of the root."""
+    if value >= WIN - 1000:
+        return value + ply
+    if value <= -WIN + 1000:
+        return value - ply
+    return value
+
+
+def from_table(value, ply):
+    if value >= WIN - 1000:
+        return value - ply
+    if value <= -WIN + 1000:
+        return value + ply
+    return value
+
+
+def best_move(board, k=3, time_limit=1.0):
+    """
+    Returns the engine's action (i, j) for a list-of-lists board of any
+    size, with k in a row to win.
+    """
+    return Engine().search(Board.from_lists(board, k), time_limit).move
@@ -0,0 +1,166 @@
+"""
+Make/unmake Tic Tac Toe
+
+A Position is one width x width board changed in place: make plays a
+cell and pushes it on an undo stack, unmake pops it back off. The
+winner and the number of empty cells are kept up to date as moves are
+made, from a count of each player's stones on every line, so search
+never copies a board or rescans it for a win.
+"""
+
+X = "X"
+O = "O"
+EMPTY = None
+
+
+def lines(width):
+    """
+    Returns the rows, columns and both diagonals of a width x width
+    board, as tuples of cell indexes (cell = width * i + j).
+    """
+    rows = [tuple(width * i + j for j in range(width)) for i in range(width)]
+    cols = [tuple(width * i + j for i in range(width)) for j in range(width)]
+    diagonals = [
+        tuple(width * i + i for i in range(width)),
+        tuple(width * i + width - 1 - i for i in range(width)),
+    ]
+    return rows + cols + diagonals
+
+
+class Position():
+    def __init__(self, board=None, width=3):
+        """
+        Starts from a list-of-lists `board` of X, O and EMPTY, or from
+        an empty width x width board.
+        """
+        if board is not None:
+            width = len(board)
+        self.width = width
+        self.size = width * width
+        self.cells = [EMPTY] * self.size
+        self.order = tuple(range(self.size))
+        self.lines_of = tuple(
+            tuple(n for n, line in enumerate(lines(width)) if cell in line)
+            for cell in self.order
+        )
+        self.counts = {X: [0] * (2 * width + 2), O: [0] * (2 * width + 2)}
+        self.empty = self.size
+        self.winner = EMPTY
+        self.turn = X
+        self.stack = []
+
+        if board is not None:
+            for i, row in enumerate(board):
+                for j, cell in enumerate(row):
+                    if cell is not EMPTY:
+                        self.place(width * i + j, cell)
+            self.turn = O if self.counts_of(X) > self.counts_of(O) else X
+            self.stack.clear()
+
+    def counts_of(self, player):
+        """Returns the number of stones `player` has on the board."""
+        return sum(1 for cell in self.cells if cell == player)
+
+    def board(self):
+        """Returns the position as a list-of-lists board."""
+        return [self.cells[self.width * i:self.width * (i + 1)] for i in range(self.width)]
+
+    def place(self, cell, player):
+        self.stack.append(self.winner)
+        self.stack.append(cell)
+        self.cells[cell] = player
+        self.empty -= 1
+        counts = self.counts[player]
+        for line in self.lines_of[cell]:
+            counts[line] += 1
+            if counts[line] == self.width:
+                self.winner = player
+
+    def make(self, cell):
+        """
+        Plays `cell` for the player to move.
+        """
+        if self.cells[cell] is not EMPTY:
+            raise RuntimeError("action is not vaild")
+        self.place(cell, self.turn)
+        self.turn = O if self.turn == X else X
+
+    def unmake(self):
+        """
+        Takes back the last move made.
+        """
+        cell = self.stack.pop()
+        self.winner = self.stack.pop()
+        player = self.cells[cell]
+        self.cells[cell] = EMPTY
+        self.empty += 1
+        counts = self.counts[player]
+        for line in self.lines_of[cell]:
+            counts[line] -= 1
+        self.turn = player
+
+    def terminal(self):
+        return self.winner is not EMPTY or self.empty == 0
+
+    def utility(self):
+        if self.winner == X:
+            return 1
+        if self.winner == O:
+            return -1
+        return 0
+
+
+def value(position):
+    """
+    Returns the minimax value of the position (1 if X wins, -1 if O
+    wins, 0 for a tie), stopping at the first child that wins for the
+    player to move, as tictactoe.dfs does.
+    """
+    if position.terminal():
+        return position.utility()
+    cells = position.cells
+    if position.turn == X:
+        best = -2
+        for cell in position.order:
+            if cells[cell] is EMPTY:
+                position.make(cell)
+                child = value(position)
+                position.unmake()
+                if child > best:
+                    best = child
+                    if best == 1:
+                        break
+    else:
+        best = 2
+        for cell in position.order:
+            if cells[cell] is EMPTY:
+                position.make(cell)
+                child = value(position)
+                position.unmake()
+                if child < best:
+                    best = child
+                    if best == -1:
+                        break
+    return best
+
+
+def minimax(board):
+    """
+    Returns the optimal action (i, j) for the player to move on a
+    list-of-lists board, or None if the game is over.
+    """
+    position = Position(board)
+    if position.terminal():
+        return None
+    maximizing = position.turn == X
+    best_value, best_cell = None, None
+    for cell in position.order:
+        if position.cells[cell] is EMPTY:
+            position.make(cell)
+            child = value(position)
+            position.unmake()
+            if (best_value is None
+                    or (maximizing and child > best_value)
+                    or (not maximizing and child < best_value)):
+                best_value, best_cell = child, cell
+    return divmod(best_cell, position.width)
@@ -0,0 +1,141 @@
+"""
+Solved-position table for Tic Tac Toe
+
+Usage: python solved.py [path]
+
+Solves every legal position once and writes the result to disk as one
+byte per board, indexed by the base-3 number of the board's canonical
+orientation (0 empty, 1 X, 2 O per cell), so 3 ** 9 = 19683 bytes.
+Each byte holds (value + 1) * 16 + best cell of the canonical board,
+with NO_MOVE for finished games and UNUSED for boards that cannot
+occur or are not canonical.
+
+lookup answers the value and best action of any board with a single
+index into the table, after trying its 8 symmetries.
+"""
+
+import os
+import sys
+
+import bitboard
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solved.table")
+
+SIZE = 3 ** 9
+NO_MOVE = 15
+UNUSED = 255
+
+# Base-3 digit values of each 9-bit mask
+BASE3 = tuple(sum(3 ** bit for bit in range(9) if mask >> bit & 1) for mask in range(1 << 9))
+
+# The table loaded by get_table, or False if there is none on disk
+table = None
+
+
+def index(board):
+    """
+    Returns the base-3 index of a bitboard.
+    """
+    x, o = board
+    return BASE3[x] + 2 * BASE3[o]
+
+
+def orient(board):
+    """
+    Returns (canonical board, symmetry number) for a bitboard, where
+    SYMMETRIES[symmetry] maps the canonical board back to `board`.
+    """
+    x, o = board
+    key, symmetry = min(
+        (mapping[x] << 9 | mapping[o], s)
+        for s, mapping in enumerate(bitboard.SYMMETRY_TABLES)
+    )
+    return (key >> 9, key & bitboard.FULL), symmetry
+
+
+def solve():
+    """
+    Returns the table as a bytearray by minimax over every position
+    reachable from the empty board, each canonical board solved once.
+    """
+    solved = bytearray([UNUSED]) * SIZE
+
+    def value(board):
+        canonical, _ = orient(board)
+        i = index(canonical)
+        if solved[i] != UNUSED:
+            return solved[i] // 16 - 1
+        if bitboard.terminal(canonical):
+            best_value, best_move = bitboard.utility(canonical), NO_MOVE
+        else:
+            maximizing = bitboard.player(canonical) == bitboard.X
+            best_value, best_move = None, NO_MOVE
+            for bit in bitboard.moves(canonical):
+                child = value(bitboard.play(canonical, bit))
+                if (best_value is None
+                        or (maximizing and child > best_value)
+                        or (not maximizing and child < best_value)):
+                    best_value, best_move = child, bit
+        solved[i] = (best_value + 1) * 16 + best_move
+        return best_value
+
+    value(bitboard.initial_state())
+    return solved
+
+
+def write(path=DEFAULT_PATH):
+    solved = solve()
+    with open(path, "wb") as f:
+        f.write(solved)
+    return solved
+
+
+def get_table(path=DEFAULT_PATH):
+    """
+    Returns the table stored at `path`, loading it on first use, or
+    None if it has not been built.
+    """
+    global table
+    if table is None:
+        try:
+            with open(path, "rb") as f:
+                table = f.read()
+        except FileNotFoundError:
+            table = False
+        if table and len(table) != SIZE:
+            table = False
+    return table or None
+
+
+def lookup(board, solved=None):
+    """
+    Returns (value, action) for a bitboard from a solved table: value
+    1 if X wins with best play, -1 if O wins, 0 for a tie, and the best
+    action (i, j), or None if the game is over. Raises RuntimeError if
+    no table is given and none has been built.
+    """
+    if solved is None:
+        solved = get_table()
+        if solved is None:
+            raise RuntimeError("no solved table: run python solved.py first")
+    canonical, symmetry = orient(board)
+    entry = solved[index(canonical)]
+    if entry == UNUSED:
+        raise ValueError("board cannot occur in a game")
+    value, move = entry // 16 - 1, entry % 16
+    if move == NO_MOVE:
+        return value, None
+    return value, bitboard.CELLS[bitboard.SYMMETRIES[symmetry][move]]
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python solved.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else DEFAULT_PATH
+    solved = write(path)
+    positions = sum(1 for entry in solved if entry != UNUSED)
+    print(f"Wrote {positions} canonical positions to {path}")
+
+
+if __name__ == "__main__":
+    main()
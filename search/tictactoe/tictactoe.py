@@ -1,9 +1,17 @@
 """
 Tic Tac Toe Player
+
+Boards are lists of lists of X, O and EMPTY. Every function also
+accepts the compact (x, o) boards of bitboard.py, which the search
+uses internally.
 """
 
 import math
 
+import bitboard
+import solved
+from bitboard import to_bitboard, from_bitboard, transposition_table
+
 X = "X"
 O = "O"
 EMPTY = None
@@ -27,6 +35,8 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
+    if isinstance(board, tuple):
+        return bitboard.player(board)
     x_num = 0
     o_num = 0
     for row in board:
@@ -49,6 +59,8 @@ def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
+    if isinstance(board, tuple):
+        return bitboard.actions(board)
     possible_action = set()
     width = len(board)
     for i in range(width):
@@ -63,15 +75,14 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    import copy
-
-    new_board = copy.deepcopy(board)
-    current_player = player(board)
+    if isinstance(board, tuple):
+        return bitboard.result(board, action)
     i, j = action
-    if board[i][j] != EMPTY or i < 0 or j < 0 or i >= len(board) or j >= len(board):
+    if i < 0 or j < 0 or i >= len(board) or j >= len(board) or board[i][j] != EMPTY:
         raise RuntimeError("action is not vaild")
 
-    new_board[i][j] = current_player
+    new_board = [row[:] for row in board]
+    new_board[i][j] = player(board)
     return new_board
 
     raise NotImplementedError
@@ -81,6 +92,8 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
+    if isinstance(board, tuple):
+        return bitboard.winner(board)
     width = len(board)
 
     # check row
@@ -105,7 +118,7 @@ def winner(board):
         if False not in (state == board[i][i] for i in range(width)):
             return state
 
-    state = board[0][2]
+    state = board[0][width - 1]
     if state != EMPTY:
         if False not in (state == board[i][width - 1 - i] for i in range(width)):
             return state
@@ -119,6 +132,8 @@ def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
+    if isinstance(board, tuple):
+        return bitboard.terminal(board)
     if winner(board):
         return True
     # check whether in process
@@ -134,6 +149,8 @@ def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
+    if isinstance(board, tuple):
+        return bitboard.utility(board)
     if winner(board) == X:
         # print("X win")
         return 1
@@ -177,6 +194,8 @@ def dfs(board, action) -> int:
 
 
 def empty(board) -> bool:
+    if isinstance(board, tuple):
+        return (board[0] | board[1]) == 0
     for row in board:
         for col in row:
             if col != EMPTY:
@@ -184,18 +203,11 @@ def empty(board) -> bool:
     return True
 
 
-def minimax(board):
+def dfs_minimax(board):
     """
-    Returns the optimal action for the current player on the board.
+    Returns the optimal action for the current player on the board,
+    searching every action with dfs (no pruning or caching).
     """
-
-    # if empty board
-    if empty(board):
-        import random
-
-        return (int(random.random() * 100) % 3, int(random.random() * 100) % 3)
-
-    # check whether end
     if terminal(board):
         return None
 
@@ -205,7 +217,6 @@ def minimax(board):
 
     # get current option actions
     current_actions = actions(board)
-    # print("current_player: "  , current_player)
     for action in current_actions:
         tmp_val = dfs(board, action)
         if current_player == X:
@@ -214,10 +225,33 @@ def minimax(board):
                 res_action = action
         else:
             if tmp_val < val:
-                # print("update action: =====================>  " , action)
                 val = tmp_val
                 res_action = action
-    # print("best val" , val)
 
     return res_action
-    raise NotImplementedError
+
+
+def alphabeta(board, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the minimax value of the board (1 if X wins, -1 if O wins,
+    0 for a tie), searching with alpha-beta pruning and caching values
+    of positions, up to symmetry, in transposition_table.
+    """
+    if not isinstance(board, tuple):
+        board = bitboard.to_bitboard(board)
+    return bitboard.alphabeta(board, alpha, beta)
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+
+    Read straight from the solved-position table if it has been built
+    (python solved.py), otherwise searched.
+    """
+    if not isinstance(board, tuple):
+        board = bitboard.to_bitboard(board)
+    table = solved.get_table()
+    if table is not None:
+        return solved.lookup(board, table)[1]
+    return bitboard.minimax(board)
@@ -0,0 +1,215 @@
+"""
+Self-play tournament for the Tic Tac Toe engines
+
+Usage: python tournament.py [--engines NAME ...] [--games N] [--size ROWS COLS K]
+                            [--time SECONDS] [--openings PLIES] [--workers N]
+                            [--seed S] [--output FILE]
+
+Plays every pair of engines against each other, N games per pairing
+with each engine taking X in half of them, without pygame. Games run
+in parallel on a process pool and start from PLIES random moves, so
+deterministic engines do not repeat one game. The time control is the
+mnk engine's time limit per move; the other engines search to the end.
+
+Prints win/draw/loss, average and p99 move latency and nodes searched
+per engine, and writes them to FILE as CSV or JSON by its extension.
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+
+import bitboard
+import mnk
+import position
+import solved
+import tictactoe as ttt
+
+COLUMNS = ["engine", "games", "wins", "draws", "losses", "moves",
+           "mean_latency_ms", "p99_latency_ms", "nodes"]
+
+
+def random_engine(board, time_limit, rng):
+    return rng.choice(board.legal_moves()), 0
+
+
+def dfs_engine(board, time_limit, rng):
+    i, j = ttt.dfs_minimax(board.to_lists())
+    return i * board.cols + j, 0
+
+
+def alphabeta_engine(board, time_limit, rng):
+    # Every move starts from a cold table, so each alphabeta call probes
+    # it once and nodes do not depend on what the worker played before
+    table = bitboard.transposition_table
+    table.clear()
+    i, j = bitboard.minimax(bitboard.to_bitboard(board.to_lists()))
+    return i * board.cols + j, table.hits + table.misses
+
+
+def table_engine(board, time_limit, rng):
+    i, j = solved.lookup(bitboard.to_bitboard(board.to_lists()))[1]
+    return i * board.cols + j, 1
+
+
+def position_engine(board, time_limit, rng):
+    i, j = position.minimax(board.to_lists())
+    return i * board.cols + j, 0
+
+
+def mnk_engine(board, time_limit, rng):
+    result = mnk.Engine().search(board, time_limit)
+    i, j = result.move
+    return i * board.cols + j, result.nodes
+
+
+# Engines by name: each takes (mnk.Board, seconds per move, random.Random)
+# and returns (cell, nodes searched), or 0 nodes if it does not count them
+ENGINES = {
+    "random": random_engine,
+    "dfs": dfs_engine,
+    "alphabeta": alphabeta_engine,
+    "table": table_engine,
+    "position": position_engine,
+    "mnk": mnk_engine,
+}
+
+# Engines that only play 3x3 Tic Tac Toe
+CLASSIC = {"dfs", "alphabeta", "table", "position"}
+
+
+def play(game):
+    """
+    Plays one game, given as (x engine, o engine, (rows, cols, k),
+    time limit, opening plies, seed). Returns (x engine, o engine,
+    winner, moves), where winner is mnk.X, mnk.O or mnk.EMPTY and moves
+    lists (engine, seconds, nodes) for every engine move.
+    """
+    x, o, (rows, cols, k), time_limit, openings, seed = game
+    rng = random.Random(seed)
+    board = mnk.Board(rows, cols, k)
+    for _ in range(openings):
+        if board.terminal():
+            break
+        board.make(rng.choice(board.legal_moves()))
+
+    moves = []
+    while not board.terminal():
+        name = x if board.side == mnk.X else o
+        start = time.perf_counter()
+        cell, nodes = ENGINES[name](board, time_limit, rng)
+        moves.append((name, time.perf_counter() - start, nodes))
+        board.make(cell)
+    return x, o, board.winner, moves
+
+
+def schedule(engines, games, size, time_limit, openings, seed):
+    """
+    Returns the games to play: `games` per pair of engines, alternating
+    which one is X, each with its own seed.
+    """
+    rng = random.Random(seed)
+    return [
+        (a, b, size, time_limit, openings, rng.getrandbits(32)) if n % 2 == 0
+        else (b, a, size, time_limit, openings, rng.getrandbits(32))
+        for a, b in itertools.combinations(engines, 2)
+        for n in range(games)
+    ]
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def report(results):
+    """
+    Returns a row of COLUMNS for each engine in the results of play.
+    """
+    rows = {}
+    latencies = {}
+    for x, o, winner, moves in results:
+        for name, side in ((x, mnk.X), (o, mnk.O)):
+            row = rows.setdefault(name, dict.fromkeys(COLUMNS, 0))
+            row["engine"] = name
+            row["games"] += 1
+            if winner == mnk.EMPTY:
+                row["draws"] += 1
+            elif winner == side:
+                row["wins"] += 1
+            else:
+                row["losses"] += 1
+        for name, seconds, nodes in moves:
+            rows[name]["moves"] += 1
+            rows[name]["nodes"] += nodes
+            latencies.setdefault(name, []).append(seconds)
+
+    for name, row in rows.items():
+        times = latencies.get(name, [])
+        row["mean_latency_ms"] = round(sum(times) / len(times) * 1000, 3) if times else 0.0
+        row["p99_latency_ms"] = round(percentile(times, 99) * 1000, 3)
+    return sorted(rows.values(), key=lambda row: (-row["wins"], row["losses"]))
+
+
+def write(rows, path):
+    with open(path, "w", newline="") as f:
+        if path.endswith(".json"):
+            json.dump(rows, f, indent=2)
+            f.write("\n")
+        else:
+            writer = csv.DictWriter(f, COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES),
+                        default=["random", "alphabeta", "table", "mnk"])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--size", type=int, nargs=3, default=[3, 3, 3],
+                        metavar=("ROWS", "COLS", "K"))
+    parser.add_argument("--time", type=float, default=0.1)
+    parser.add_argument("--openings", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    if tuple(args.size) != (3, 3, 3) and CLASSIC & set(args.engines):
+        sys.exit(f"Engines {sorted(CLASSIC & set(args.engines))} only play 3x3")
+    if "table" in args.engines and solved.get_table() is None:
+        solved.write()
+        solved.table = None
+
+    games = schedule(args.engines, args.games, tuple(args.size), args.time,
+                     args.openings, args.seed)
+    start = time.perf_counter()
+    chunksize = max(1, len(games) // (4 * (args.workers or 1)))
+    with concurrent.futures.ProcessPoolExecutor(args.workers) as pool:
+        results = list(pool.map(play, games, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    rows = report(results)
+    print(f"{len(results)} games in {elapsed:.1f} s")
+    print(f"{'engine':10} {'games':>6} {'wins':>6} {'draws':>6} {'losses':>6} "
+          f"{'mean ms':>9} {'p99 ms':>9} {'nodes':>10}")
+    for row in rows:
+        print(f"{row['engine']:10} {row['games']:6} {row['wins']:6} {row['draws']:6} "
+              f"{row['losses']:6} {row['mean_latency_ms']:9.3f} {row['p99_latency_ms']:9.3f} "
+              f"{row['nodes']:10}")
+    if args.output:
+        write(rows, args.output)
+
+
+if __name__ == "__main__":
+    main()